@@ -5,10 +5,15 @@ CLI interface for headless usage.
 import asyncio
 import sys
 from pathlib import Path
+from typing import TextIO
 
 import click
 
 from flux.core.engine import AdaptiveDownloadEngine, DownloadStatus
+from flux.core.manifest import Manifest, load_manifest
+from flux.network.cache import DEFAULT_CACHE_PATH
+from flux.storage.hashing import new_hasher
+from flux.storage.verify import verify_file
 
 
 @click.group()
@@ -19,21 +24,178 @@ def cli() -> None:
 
 
 @cli.command()
-@click.argument("url")
+@click.argument("url", required=False)
+@click.option(
+    "--input-file",
+    "-i",
+    type=click.File("r"),
+    default=None,
+    help="File with one URL per line ('-' for stdin); blank and # lines are skipped",
+)
 @click.option(
     "--output", "-o", default="~/Downloads", help="Output directory"
 )
 @click.option("--filename", "-f", default=None, help="Custom filename")
-def download(url: str, output: str, filename: str | None) -> None:
-    """Download a file via CLI."""
-    asyncio.run(_download_file(url, output, filename))
+@click.option(
+    "--mirror",
+    "-m",
+    "mirrors",
+    multiple=True,
+    help="Equivalent source URL (repeatable); ranges are spread across mirrors",
+)
+@click.option(
+    "--max-active", default=3, show_default=True, help="Maximum concurrent downloads"
+)
+@click.option(
+    "--max-connections",
+    default=32,
+    show_default=True,
+    help="Total connections shared by all active downloads",
+)
+@click.option("--sha256", metavar="HEX", default=None, help="Expected SHA-256 digest")
+@click.option("--md5", metavar="HEX", default=None, help="Expected MD5 digest")
+@click.option(
+    "--crc32c", metavar="HEX", default=None, help="Expected CRC32C (needs the crc32c package)"
+)
+@click.option(
+    "--fast-start",
+    is_flag=True,
+    help="Skip the probe; the first range request reveals the file's size",
+)
+@click.option(
+    "--no-hedge",
+    is_flag=True,
+    help="Don't race duplicate requests against ranges that run late",
+)
+@click.option(
+    "--no-recycle",
+    is_flag=True,
+    help="Keep connections that are consistently slower than their peers",
+)
+@click.option(
+    "--no-cache",
+    is_flag=True,
+    help="Neither use nor update the cache of file info and host capabilities",
+)
+def download(
+    url: str | None,
+    input_file: TextIO | None,
+    output: str,
+    filename: str | None,
+    mirrors: tuple[str, ...],
+    max_active: int,
+    max_connections: int,
+    sha256: str | None,
+    md5: str | None,
+    crc32c: str | None,
+    fast_start: bool,
+    no_hedge: bool,
+    no_recycle: bool,
+    no_cache: bool,
+) -> None:
+    """
+    Download a file via CLI.
+    
+    URL may also be the path of a Metalink (RFC 5854) or JSON manifest;
+    every file it lists is downloaded from its mirrors and verified
+    against its hashes.
+    
+    The file is hashed while it downloads; with --sha256, --md5 or
+    --crc32c the download fails unless the digest matches.
+    
+    With --input-file, every listed URL (plus URL, if given) is probed
+    concurrently and downloaded; a URL that fails does not stop the rest.
+    """
+    batch: list[str] = []
+    if input_file is not None:
+        batch = [url] if url else []
+        for line in input_file:
+            line = line.strip()
+            if line and not line.startswith("#"):
+                batch.append(line)
+        if not batch:
+            raise click.UsageError("No URLs to download")
+        if filename or mirrors or sha256 or md5 or crc32c:
+            raise click.UsageError(
+                "--filename, --mirror and checksums apply to a single URL, not --input-file"
+            )
+    elif not url:
+        raise click.UsageError("Pass a URL or --input-file")
+    
+    checksums = {
+        name: value
+        for name, value in (("sha256", sha256), ("md5", md5), ("crc32c", crc32c))
+        if value
+    }
+    if len(checksums) > 1:
+        raise click.UsageError("Pass only one of --sha256, --md5 and --crc32c")
+    checksum = next(iter(checksums.items()), None)
+    if checksum:
+        try:
+            new_hasher(checksum[0])
+        except ValueError as e:
+            raise click.UsageError(str(e))
+    
+    manifests: list[Manifest] = []
+    if not batch and Path(url).expanduser().is_file():
+        try:
+            manifests = load_manifest(url)
+        except (OSError, ValueError) as e:
+            raise click.BadParameter(str(e), param_hint="URL")
+    
+    # Not list(): the module-level `list` command shadows the builtin
+    completed = asyncio.run(
+        _download_file(
+            url,
+            output,
+            filename,
+            [*mirrors],
+            max_active,
+            max_connections,
+            manifests,
+            checksum,
+            fast_start,
+            batch,
+            no_cache,
+            hedge_requests=not no_hedge,
+            recycle_slow_connections=not no_recycle,
+        )
+    )
+    if not completed:
+        sys.exit(1)
 
 
-async def _download_file(url: str, output: str, filename: str | None) -> None:
-    """Async download implementation."""
+async def _download_file(
+    url: str | None,
+    output: str,
+    filename: str | None,
+    mirrors: list[str],
+    max_active: int,
+    max_connections: int,
+    manifests: list[Manifest] | None = None,
+    checksum: tuple[str, str] | None = None,
+    fast_start: bool = False,
+    batch: list[str] | None = None,
+    no_cache: bool = False,
+    hedge_requests: bool = True,
+    recycle_slow_connections: bool = True,
+) -> bool:
+    """
+    Async download implementation.
+    
+    Returns:
+        True if every requested download completed
+    """
     output_path = Path(output).expanduser()
     
-    engine = AdaptiveDownloadEngine()
+    engine = AdaptiveDownloadEngine(
+        max_active_downloads=max_active,
+        connection_budget=max_connections,
+        hedge_requests=hedge_requests,
+        recycle_slow_connections=recycle_slow_connections,
+        fast_start=fast_start,
+        cache_path=None if no_cache else DEFAULT_CACHE_PATH,
+    )
     await engine.start()
     
     # Register progress callback
@@ -55,34 +217,141 @@ async def _download_file(url: str, output: str, filename: str | None) -> None:
         
         elif event_type == "download_completed":
             print(f"\n✓ Download completed: {data['filepath']}")
+            if data.get("digest"):
+                print(f"  {data['hash_algorithm']}: {data['digest']}")
         
         elif event_type == "download_failed":
-            print(f"\n✗ Download failed: {data['error']}", file=sys.stderr)
+            source = f" ({data['url']})" if data.get("url") else ""
+            print(f"\n✗ Download failed{source}: {data['error']}", file=sys.stderr)
+        
+        elif event_type == "mirror_rejected":
+            print(f"\n! Mirror skipped: {data['url']} ({data['reason']})", file=sys.stderr)
+        
+        elif event_type == "ranges_unsupported":
+            print(
+                "\n! Server ignores range requests, continuing over one connection",
+                file=sys.stderr,
+            )
+        
+        elif event_type == "piece_corrupt":
+            print(
+                f"\n! Piece {data['index']} failed verification, refetching",
+                file=sys.stderr,
+            )
     
     engine.on_event(on_event)
     
     try:
-        download_id = await engine.add_download(url, str(output_path), filename)
+        download_ids = []
+        if batch:
+            # Failures are reported through the download_failed event
+            results = await engine.add_downloads(batch, str(output_path))
+            download_ids = [result for result in results if isinstance(result, str)]
+        elif manifests:
+            for manifest in manifests:
+                try:
+                    download_ids.append(
+                        await engine.add_download(
+                            manifest.urls[0],
+                            str(output_path),
+                            filename if len(manifests) == 1 else None,
+                            mirrors=mirrors,
+                            manifest=manifest,
+                            hash_algorithm=checksum[0] if checksum else None,
+                            expected_digest=checksum[1] if checksum else None,
+                        )
+                    )
+                except Exception:
+                    pass  # Reported through the download_failed event
+        else:
+            try:
+                download_ids.append(
+                    await engine.add_download(
+                        url,
+                        str(output_path),
+                        filename,
+                        mirrors=mirrors,
+                        hash_algorithm=checksum[0] if checksum else None,
+                        expected_digest=checksum[1] if checksum else None,
+                    )
+                )
+            except Exception:
+                pass  # Reported through the download_failed event
         
         # Wait for completion
         while True:
-            task = engine.get_download(download_id)
-            if not task:
-                break
-            
-            if task.status in (
-                DownloadStatus.COMPLETED,
-                DownloadStatus.FAILED,
-                DownloadStatus.CANCELLED,
+            tasks = [engine.get_download(download_id) for download_id in download_ids]
+            if all(
+                task is None
+                or task.status
+                in (
+                    DownloadStatus.COMPLETED,
+                    DownloadStatus.FAILED,
+                    DownloadStatus.CANCELLED,
+                )
+                for task in tasks
             ):
                 break
             
             await asyncio.sleep(0.5)
+        
+        # Downloads that could not even be added count as failed
+        requested = len(batch or manifests or [url])
+        tasks = [engine.get_download(download_id) for download_id in download_ids]
+        completed = sum(
+            1 for task in tasks if task and task.status == DownloadStatus.COMPLETED
+        )
+        if batch:
+            print(f"\n{completed} of {requested} downloads completed")
+        return completed == requested
     
     finally:
         await engine.stop()
 
 
+@cli.command()
+@click.argument("path", type=click.Path(exists=True, dir_okay=False))
+@click.option(
+    "--algorithm", "-a", default="sha256", show_default=True, help="sha256, md5, crc32c, ..."
+)
+@click.option("--expected", "-e", metavar="HEX", default=None, help="Expected digest")
+@click.option(
+    "--segment-size",
+    default=64,
+    show_default=True,
+    help="Segment size in MB for the parallel tree hash",
+)
+@click.option("--workers", "-j", type=int, default=None, help="Worker processes")
+def verify(
+    path: str, algorithm: str, expected: str | None, segment_size: int, workers: int | None
+) -> None:
+    """
+    Verify a file on disk.
+    
+    Prints the plain digest (as sha256sum would) and a tree digest of the
+    segments hashed in parallel. With --expected, exits with status 1
+    unless either one matches.
+    """
+    try:
+        result = verify_file(path, algorithm, segment_size * 1024 * 1024, workers)
+    except ValueError as e:
+        raise click.UsageError(str(e))
+    
+    rate = result.size / result.elapsed / (1024 * 1024) if result.elapsed else 0.0
+    click.echo(f"{algorithm}: {result.digest}")
+    click.echo(
+        f"tree ({len(result.segment_digests)} x {result.segment_size // (1024 * 1024)}MB): "
+        f"{result.tree_digest}"
+    )
+    click.echo(f"{result.size} bytes in {result.elapsed:.2f}s ({rate:.1f} MB/s)")
+    
+    if expected:
+        if not result.matches(expected):
+            click.echo("✗ Digest mismatch", err=True)
+            sys.exit(1)
+        click.echo("✓ Digest matches")
+
+
 @cli.command()
 def list() -> None:
     """List recent downloads (not implemented in CLI)."""
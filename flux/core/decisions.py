@@ -3,9 +3,10 @@ Adaptive decision engine for download optimization.
 """
 
 import time
+from collections import deque
 from dataclasses import dataclass, field
 from enum import Enum
-from typing import Any, Dict, List
+from typing import Any, Deque, Dict, List, Tuple
 
 from flux.core.metrics import DownloadMetrics
 
@@ -54,9 +55,21 @@ class Decision:
         return "\n".join(lines)
 
 
+@dataclass
+class _DecisionState:
+    """Cooldowns and recent decisions of a single download."""
+    
+    decisions: Deque[Decision]
+    last_decision_time: Dict[str, float] = field(default_factory=dict)
+
+
 class DecisionEngine:
     """
     Analyzes metrics and makes adaptive decisions to optimize downloads.
+    
+    Cooldowns are tracked per download, so each download adapts on its own
+    schedule. Connection changes are additionally rate-limited per origin
+    host, since every download from that host shares its capacity.
     """
     
     # Configuration thresholds
@@ -71,10 +84,13 @@ class DecisionEngine:
     MIN_CONNECTIONS = 1
     MAX_CONNECTIONS = 16
     
+    # Decisions kept per download
+    HISTORY_SIZE = 50
+    
     def __init__(self) -> None:
         """Initialize decision engine."""
-        self.decisions: List[Decision] = []
-        self._last_decision_time: Dict[str, float] = {}
+        self._states: Dict[str, _DecisionState] = {}
+        self._host_decision_time: Dict[Tuple[str, str], float] = {}
         self._decision_cooldown = 5.0  # seconds between same decision type
     
     def analyze(
@@ -83,6 +99,7 @@ class DecisionEngine:
         current_chunk_size: int,
         current_connections: int,
         supports_ranges: bool = True,
+        host: str = "",
     ) -> List[Decision]:
         """
         Analyze metrics and return adaptive decisions.
@@ -92,6 +109,7 @@ class DecisionEngine:
             current_chunk_size: Current chunk size in bytes
             current_connections: Current number of connections
             supports_ranges: Whether server supports range requests
+            host: Origin host of the download
         
         Returns:
             List of decisions to apply
@@ -102,9 +120,11 @@ class DecisionEngine:
         if len(metrics.speed_history) < 10:
             return new_decisions
         
+        state = self._get_state(metrics.download_id)
+        
         # Check chunk size optimization
         chunk_decision = self._analyze_chunk_size(
-            metrics, current_chunk_size
+            metrics, current_chunk_size, state
         )
         if chunk_decision:
             new_decisions.append(chunk_decision)
@@ -112,7 +132,7 @@ class DecisionEngine:
         # Check connection count optimization
         if supports_ranges:
             conn_decision = self._analyze_connections(
-                metrics, current_connections
+                metrics, current_connections, state, host
             )
             if conn_decision:
                 new_decisions.append(conn_decision)
@@ -120,31 +140,36 @@ class DecisionEngine:
         # Store decisions
         for decision in new_decisions:
             decision.download_id = metrics.download_id
-            self.decisions.append(decision)
+            state.decisions.append(decision)
         
         return new_decisions
     
+    def _get_state(self, download_id: str) -> _DecisionState:
+        """Get or create the decision state of a download."""
+        state = self._states.get(download_id)
+        if state is None:
+            state = _DecisionState(decisions=deque(maxlen=self.HISTORY_SIZE))
+            self._states[download_id] = state
+        return state
+    
+    def forget(self, download_id: str) -> None:
+        """Drop all decision state of a download."""
+        self._states.pop(download_id, None)
+    
     def _analyze_chunk_size(
-        self, metrics: DownloadMetrics, current_size: int
+        self, metrics: DownloadMetrics, current_size: int, state: _DecisionState
     ) -> Decision | None:
         """Analyze whether to adjust chunk size."""
         
         # Check cooldown
-        if not self._check_cooldown("chunk_size"):
+        if not self._check_cooldown(state.last_decision_time, "chunk_size"):
             return None
         
         # Calculate speed stability
-        speeds = list(metrics.speed_history)
-        if len(speeds) < 2:
+        if len(metrics.speed_history) < 2 or metrics.speed_mean == 0:
             return None
         
-        import statistics
-        mean_speed = statistics.mean(speeds)
-        if mean_speed == 0:
-            return None
-        
-        stdev = statistics.stdev(speeds)
-        cv = stdev / mean_speed  # Coefficient of variation
+        cv = metrics.speed_cv  # Coefficient of variation
         
         # High RTT + stable speed → increase chunk size
         if (
@@ -153,7 +178,7 @@ class DecisionEngine:
             and current_size < self.MAX_CHUNK_SIZE
         ):
             new_size = min(current_size * 2, self.MAX_CHUNK_SIZE)
-            self._update_cooldown("chunk_size")
+            self._update_cooldown(state.last_decision_time, "chunk_size")
             return Decision(
                 decision_type=DecisionType.INCREASE_CHUNK_SIZE,
                 reason="Stable throughput + high RTT detected",
@@ -169,7 +194,7 @@ class DecisionEngine:
             and current_size > self.MIN_CHUNK_SIZE
         ):
             new_size = max(current_size // 2, self.MIN_CHUNK_SIZE)
-            self._update_cooldown("chunk_size")
+            self._update_cooldown(state.last_decision_time, "chunk_size")
             return Decision(
                 decision_type=DecisionType.DECREASE_CHUNK_SIZE,
                 reason="Unstable throughput + low RTT detected",
@@ -181,12 +206,19 @@ class DecisionEngine:
         return None
     
     def _analyze_connections(
-        self, metrics: DownloadMetrics, current_connections: int
+        self,
+        metrics: DownloadMetrics,
+        current_connections: int,
+        state: _DecisionState,
+        host: str = "",
     ) -> Decision | None:
         """Analyze whether to adjust connection count."""
         
-        # Check cooldown
-        if not self._check_cooldown("connections"):
+        # Check cooldown for this download and its host
+        host_key = (host, "connections")
+        if not self._check_cooldown(state.last_decision_time, "connections"):
+            return None
+        if host and not self._check_cooldown(self._host_decision_time, host_key):
             return None
         
         # Calculate error rate
@@ -200,7 +232,9 @@ class DecisionEngine:
             and metrics.efficiency_score > 70
         ):
             new_connections = min(current_connections * 2, self.MAX_CONNECTIONS)
-            self._update_cooldown("connections")
+            self._update_cooldown(state.last_decision_time, "connections")
+            if host:
+                self._update_cooldown(self._host_decision_time, host_key)
             return Decision(
                 decision_type=DecisionType.INCREASE_CONNECTIONS,
                 reason="Low error rate, server handles load well",
@@ -215,7 +249,9 @@ class DecisionEngine:
             and current_connections > self.MIN_CONNECTIONS
         ):
             new_connections = max(current_connections // 2, self.MIN_CONNECTIONS)
-            self._update_cooldown("connections")
+            self._update_cooldown(state.last_decision_time, "connections")
+            if host:
+                self._update_cooldown(self._host_decision_time, host_key)
             return Decision(
                 decision_type=DecisionType.DECREASE_CONNECTIONS,
                 reason="High error rate detected",
@@ -226,14 +262,14 @@ class DecisionEngine:
         
         return None
     
-    def _check_cooldown(self, decision_key: str) -> bool:
+    def _check_cooldown(self, last_decision_time: Dict[Any, float], decision_key: Any) -> bool:
         """Check if enough time has passed since last decision of this type."""
-        last_time = self._last_decision_time.get(decision_key, 0)
+        last_time = last_decision_time.get(decision_key, 0)
         return time.time() - last_time >= self._decision_cooldown
     
-    def _update_cooldown(self, decision_key: str) -> None:
+    def _update_cooldown(self, last_decision_time: Dict[Any, float], decision_key: Any) -> None:
         """Update last decision time."""
-        self._last_decision_time[decision_key] = time.time()
+        last_decision_time[decision_key] = time.time()
     
     def _format_size(self, size: int) -> str:
         """Format size in KB/MB."""
@@ -242,11 +278,19 @@ class DecisionEngine:
         else:
             return f"{size // 1024}KB"
     
+    @property
+    def decisions(self) -> List[Decision]:
+        """All retained decisions across downloads, oldest first."""
+        merged = [d for state in self._states.values() for d in state.decisions]
+        return sorted(merged, key=lambda d: d.timestamp)
+    
     def export_decisions(self) -> List[Dict[str, Any]]:
         """Export all decisions as list of dictionaries."""
         return [d.to_dict() for d in self.decisions]
     
     def get_recent_decisions(self, download_id: str, limit: int = 5) -> List[Decision]:
         """Get recent decisions for a download."""
-        filtered = [d for d in self.decisions if d.download_id == download_id]
-        return filtered[-limit:]
+        state = self._states.get(download_id)
+        if not state or limit <= 0:
+            return []
+        return list(state.decisions)[-limit:]
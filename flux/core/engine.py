@@ -3,15 +3,25 @@ Main adaptive download engine.
 """
 
 import asyncio
+import heapq
+import time
 import uuid
-from dataclasses import dataclass
+from collections import deque
+from contextlib import aclosing
+from dataclasses import dataclass, field
 from enum import Enum
 from pathlib import Path
-from typing import Callable, Dict, List, Optional
+from typing import AsyncIterator, Callable, Deque, Dict, List, Optional, Set, Tuple, Union
+from urllib.parse import urlparse
 
-from flux.core.decisions import Decision, DecisionEngine
+from flux.core.decisions import Decision, DecisionEngine, DecisionType
+from flux.core.manifest import Manifest
 from flux.core.metrics import DownloadMetrics
-from flux.network.client import AdaptiveHTTPClient
+from flux.network.cache import DEFAULT_CACHE_PATH, HostCache
+from flux.network.client import AdaptiveHTTPClient, FileInfo, RangeNotSupportedError
+from flux.storage.hashing import new_hasher
+from flux.storage.ranges import RangeSet
+from flux.storage.verify import SEGMENT_SIZE, VerificationResult, verify_file
 from flux.storage.writer import AsyncFileWriter
 
 
@@ -39,24 +49,185 @@ class DownloadTask:
     metrics: DownloadMetrics
     error_message: Optional[str] = None
     
+    # Equivalent source URLs besides url, validated against its size/ETag
+    mirrors: List[str] = field(default_factory=list)
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+    
+    # Final redirect target of url that range requests are sent to, and its
+    # expiry for signed URLs (the client re-resolves when it stops working)
+    resolved_url: Optional[str] = None
+    url_expires_at: Optional[float] = None
+    
+    # Expected size and hashes, when added from a Metalink/JSON manifest
+    manifest: Optional[Manifest] = None
+    
+    # Whole-file digest computed while downloading; must equal
+    # expected_digest (when set) for the download to complete
+    hash_algorithm: Optional[str] = None
+    expected_digest: Optional[str] = None
+    digest: Optional[str] = None
+    
+    # Added without a probe: size, range support and validators are filled
+    # in from the first range response
+    fast_start: bool = False
+    
     # Adaptive parameters
     chunk_size: int = 1024 * 1024  # 1MB default
     num_connections: int = 8  # Start with 8 for performance
 
 
+@dataclass
+class _Mirror:
+    """Health and throughput of one source URL during a multipart download."""
+    
+    url: str
+    throughput: float = 0.0  # smoothed bytes/sec of a single range fetch
+    active: int = 0
+    failures: int = 0  # consecutive
+    disabled_until: float = 0.0
+
+
+@dataclass
+class _InFlightRange:
+    """A byte range [start, end) currently being fetched by a worker."""
+    
+    start: int
+    end: int  # Lowered when the tail is handed to another worker
+    position: int
+    started_at: float = field(default_factory=time.time)
+    
+    mirror: Optional[_Mirror] = None
+    
+    # Hedging: the duplicate request racing this one, if any
+    partner: Optional["_InFlightRange"] = None
+    is_hedge: bool = False
+    fetch: Optional[asyncio.Task] = None
+
+
+@dataclass
+class _MultipartState:
+    """Shared state of the connection workers of one multipart download."""
+    
+    ranges: asyncio.Queue
+    mirrors: List[_Mirror]
+    next_offset: int = 0
+    exhausted: bool = False
+    in_flight: List[_InFlightRange] = field(default_factory=list)
+    
+    # Failed ranges as a heap of (ready_at, offset, size, attempt)
+    retries: List[Tuple[float, int, int, int]] = field(default_factory=list)
+    failures: int = 0
+    
+    # Manifest pieces verified (or being verified) against their hash
+    verified: Set[int] = field(default_factory=set)
+    
+    # Connection target that sustained the peak speed, the target currently
+    # held and since when, and whether fewer connections were called for
+    best_speed: float = 0.0
+    best_connections: int = 0
+    steady_connections: int = 0
+    steady_since: float = 0.0
+    connections_reduced: bool = False
+    
+    def has_ready_work(self) -> bool:
+        """Whether a worker could pick up a range right now."""
+        if not self.ranges.empty():
+            return True
+        return bool(self.retries) and self.retries[0][0] <= time.time()
+    
+    def is_done(self) -> bool:
+        """Whether every range has been planned and fetched."""
+        return (
+            self.exhausted
+            and self.ranges.empty()
+            and not self.in_flight
+            and not self.retries
+        )
+
+
 class AdaptiveDownloadEngine:
     """
     Core download engine with adaptive intelligence.
     Emits events for UI consumption.
     """
     
-    def __init__(self) -> None:
-        """Initialize download engine."""
+    # Seconds between supervisor passes (decisions, pool resize, progress)
+    SUPERVISOR_INTERVAL = 0.5
+    
+    # Upper bound for the backoff of a failed range
+    MAX_RETRY_BACKOFF = 30.0  # seconds
+    
+    # End game: smallest remaining tail worth splitting off to an idle worker
+    ENDGAME_MIN_SPLIT = 1024 * 1024  # 1MB
+    
+    # Hedging: a range running HEDGE_AFTER times longer than expected at the
+    # observed per-connection throughput gets a duplicate request
+    HEDGE_AFTER = 3.0
+    HEDGE_MIN_SECONDS = 2.0
+    HEDGE_MIN_BYTES = 256 * 1024  # 256KB
+    MAX_HEDGES = 2  # per download
+    
+    # Resume checkpoints: whichever budget is hit first triggers a save
+    CHECKPOINT_INTERVAL = 5.0  # seconds
+    CHECKPOINT_BYTES = 64 * 1024 * 1024  # 64MB
+    
+    # A connection target counts as measured once held this long
+    CONNECTIONS_STEADY_AFTER = 3.0  # seconds
+    
+    # Fast start: range requested by the first GET, which replaces the probe
+    FAST_START_BYTES = 1024 * 1024  # 1MB
+    
+    # Bulk adds: probes in flight overall and per host (below the client's
+    # per-host pool size, so running downloads keep their connections)
+    PROBE_CONCURRENCY = 32
+    PROBE_PER_HOST = 4
+    
+    def __init__(
+        self,
+        max_active_downloads: int = 3,
+        connection_budget: int = 32,
+        chunk_retry_budget: int = 20,
+        hedge_requests: bool = True,
+        recycle_slow_connections: bool = True,
+        fast_start: bool = False,
+        cache_path: Optional[Union[str, Path]] = DEFAULT_CACHE_PATH,
+    ) -> None:
+        """
+        Initialize download engine.
+        
+        Args:
+            max_active_downloads: Downloads allowed to run at the same time;
+                further starts wait in the queue
+            connection_budget: Total connections shared by all active downloads
+            chunk_retry_budget: Failed range fetches tolerated per download
+                before it is marked FAILED
+            hedge_requests: Race a duplicate request against ranges that run
+                well past their expected finish
+            recycle_slow_connections: Close connections that are consistently
+                slower than their peers, so requests land on other backends
+            fast_start: Skip the probe and learn about the file from a first
+                range GET that already carries data (see add_download)
+            cache_path: File remembering file info and host capabilities
+                across runs, so repeat downloads skip cold probes; None
+                disables it
+        """
         self.downloads: Dict[str, DownloadTask] = {}
         self.decision_engine = DecisionEngine()
+        self.max_active_downloads = max(1, max_active_downloads)
+        self.connection_budget = max(1, connection_budget)
+        self.chunk_retry_budget = max(0, chunk_retry_budget)
+        self.hedge_requests = hedge_requests
+        self.recycle_slow_connections = recycle_slow_connections
+        self.fast_start = fast_start
+        self.stats: Dict[str, int] = {"hedged_requests": 0, "hedge_wins": 0}
+        self._client_stats: Dict[str, int] = {}  # Outlives the client after stop()
         self._event_callbacks: List[Callable] = []
         self._active_tasks: Dict[str, asyncio.Task] = {}
+        self._pending: Deque[str] = deque()  # Start requests waiting for a slot
         self._http_client: Optional[AdaptiveHTTPClient] = None
+        self._cache = HostCache(cache_path) if cache_path is not None else None
+        self._cache_lock = asyncio.Lock()  # Keeps snapshots written in order
         self._stopped: bool = False
     
     def on_event(self, callback: Callable) -> None:
@@ -84,7 +255,12 @@ class AdaptiveDownloadEngine:
     
     async def start(self) -> None:
         """Start the engine."""
-        self._http_client = AdaptiveHTTPClient()
+        if self._cache is not None:
+            await asyncio.to_thread(self._cache.load)
+        self._http_client = AdaptiveHTTPClient(
+            recycle_slow_connections=self.recycle_slow_connections, cache=self._cache
+        )
+        self._client_stats = self._http_client.stats
         await self._http_client.__aenter__()
         self._emit_event("engine_started", {})
     
@@ -108,11 +284,36 @@ class AdaptiveDownloadEngine:
             except Exception:
                 pass
             self._http_client = None
+        await self._save_cache()
         
         self._emit_event("engine_stopped", {})
     
+    async def _save_cache(self) -> None:
+        """Write the persistent cache in a thread if it changed."""
+        if self._cache is None:
+            return
+        async with self._cache_lock:
+            if not self._cache.dirty:
+                return
+            data = self._cache.snapshot()
+            try:
+                await asyncio.to_thread(self._cache.write, data)
+            except OSError:
+                pass  # Only an optimization; downloads work without it
+    
     async def add_download(
-        self, url: str, output_dir: str, filename: Optional[str] = None, auto_start: bool = True
+        self,
+        url: str,
+        output_dir: str,
+        filename: Optional[str] = None,
+        auto_start: bool = True,
+        mirrors: Optional[List[str]] = None,
+        manifest: Optional[Manifest] = None,
+        hash_algorithm: Optional[str] = None,
+        expected_digest: Optional[str] = None,
+        fast_start: Optional[bool] = None,
+        size: Optional[int] = None,
+        supports_ranges: Optional[bool] = None,
     ) -> str:
         """
         Add a new download.
@@ -121,6 +322,21 @@ class AdaptiveDownloadEngine:
             url: Download URL
             output_dir: Output directory
             filename: Optional custom filename
+            auto_start: Start (or queue for start) right away
+            mirrors: Optional equivalent URLs to spread ranges across
+            manifest: Optional manifest; its URLs are used as mirrors, its
+                name as default filename, and its hashes to verify the data
+            hash_algorithm: Compute this digest ("sha256", "md5", "crc32c", ...)
+                while downloading; defaults to the manifest's whole-file hash
+            expected_digest: Hex digest the download must match
+            fast_start: Skip the probe; the worker's first request is a
+                ``bytes=0-`` range GET whose response supplies the size,
+                range support and filename, and further connections are only
+                opened if the file extends past it. Defaults to the engine
+                setting
+            size: Known file size; together with supports_ranges it skips
+                the probe entirely
+            supports_ranges: Whether the server is known to honour ranges
         
         Returns:
             Download ID
@@ -128,22 +344,62 @@ class AdaptiveDownloadEngine:
         if not self._http_client:
             raise RuntimeError("Engine not started")
         
+        if manifest is not None and manifest.hash_value and hash_algorithm is None:
+            hash_algorithm, expected_digest = manifest.hash_type, manifest.hash_value
+        if expected_digest and not hash_algorithm:
+            raise ValueError("expected_digest requires hash_algorithm")
+        if hash_algorithm:
+            new_hasher(hash_algorithm)  # Fail now if the algorithm is unavailable
+        
+        if fast_start is None:
+            fast_start = self.fast_start
+        
         # Get file info
-        try:
-            total_size, supports_ranges, detected_filename = (
-                await self._http_client.get_file_info(url)
+        if size is not None and supports_ranges is not None:
+            # Caller already knows the file: no request needed
+            info = FileInfo(
+                size=size,
+                supports_ranges=supports_ranges,
+                filename=self._http_client.filename_from_url(url),
             )
-        except Exception as e:
-            download_id = str(uuid.uuid4())
-            self._emit_event(
-                "download_failed",
-                {"download_id": download_id, "url": url, "error": str(e)},
+            fast_start = False
+        elif fast_start:
+            # Learned from the first range response once the worker starts
+            info = FileInfo(
+                size=size or 0,
+                supports_ranges=False,
+                filename=self._http_client.filename_from_url(url),
             )
-            raise
+        else:
+            try:
+                info = await self._http_client.probe(url)
+                self._check_manifest_size(manifest, info.size)
+            except Exception as e:
+                download_id = str(uuid.uuid4())
+                self._emit_event(
+                    "download_failed",
+                    {"download_id": download_id, "url": url, "error": str(e)},
+                )
+                raise
+        total_size, supports_ranges, detected_filename = (
+            info.size, info.supports_ranges, info.filename
+        )
+        
+        if manifest is not None:
+            total_size = total_size or manifest.size or 0
+            mirrors = [*manifest.urls, *(mirrors or [])]
+            filename = filename or manifest.name
         
         # Use provided filename or detected
         final_filename = filename or detected_filename
-        filepath = str(Path(output_dir) / final_filename)
+        try:
+            filepath = self._output_path(output_dir, final_filename)
+        except ValueError as e:
+            self._emit_event(
+                "download_failed",
+                {"download_id": str(uuid.uuid4()), "url": url, "error": str(e)},
+            )
+            raise
         
         # Create download task
         download_id = str(uuid.uuid4())
@@ -158,8 +414,30 @@ class AdaptiveDownloadEngine:
             status=DownloadStatus.QUEUED,
             supports_ranges=supports_ranges,
             metrics=metrics,
+            etag=info.etag,
+            last_modified=info.last_modified,
+            resolved_url=info.final_url,
+            url_expires_at=info.expires_at,
+            manifest=manifest,
+            hash_algorithm=hash_algorithm,
+            expected_digest=expected_digest.lower() if expected_digest else None,
+            fast_start=fast_start,
         )
         
+        profile = self._cache.get_host(url) if self._cache is not None else None
+        if profile is not None and profile.connections:
+            # Start where the last download from this host peaked
+            task.num_connections = max(
+                DecisionEngine.MIN_CONNECTIONS,
+                min(profile.connections, DecisionEngine.MAX_CONNECTIONS),
+            )
+        
+        if fast_start:
+            # Validated once the first response shows the file
+            task.mirrors = [*dict.fromkeys(mirrors or [])]
+        elif mirrors and supports_ranges:
+            task.mirrors = await self._validate_mirrors(task, mirrors)
+        
         self.downloads[download_id] = task
         
         self._emit_event(
@@ -179,10 +457,153 @@ class AdaptiveDownloadEngine:
         
         return download_id
     
+    async def add_downloads(
+        self,
+        urls: List[str],
+        output_dir: str,
+        auto_start: bool = True,
+        fast_start: Optional[bool] = None,
+    ) -> List[Union[str, Exception]]:
+        """
+        Add many downloads, probing them concurrently.
+        
+        At most PROBE_CONCURRENCY probes run at once and PROBE_PER_HOST per
+        host, so each host's keep-alive connections are reused from one
+        probe to the next. Every download is added (and started or queued)
+        as soon as its own probe returns. A URL that fails is reported with
+        a download_failed event without stopping the others.
+        
+        Args:
+            urls: Download URLs
+            output_dir: Output directory
+            auto_start: Start (or queue for start) each download once added
+            fast_start: See add_download
+        
+        Returns:
+            For each URL in order, its download ID or the exception it failed with
+        """
+        if not self._http_client:
+            raise RuntimeError("Engine not started")
+        
+        overall = asyncio.Semaphore(self.PROBE_CONCURRENCY)
+        per_host: Dict[str, asyncio.Semaphore] = {}
+        
+        async def add(url: str) -> str:
+            # Wait for the host first, so queued URLs of a busy host do not
+            # hold slots other hosts could use
+            host = per_host.setdefault(
+                urlparse(url).netloc, asyncio.Semaphore(self.PROBE_PER_HOST)
+            )
+            async with host, overall:
+                return await self.add_download(
+                    url, output_dir, auto_start=auto_start, fast_start=fast_start
+                )
+        
+        return await asyncio.gather(*(add(url) for url in urls), return_exceptions=True)
+    
+    @staticmethod
+    def _output_path(output_dir: str, filename: str) -> str:
+        """
+        Path of filename in output_dir.
+        
+        Names from manifests and Content-Disposition headers are not
+        trusted, so the resolved path must stay inside output_dir.
+        
+        Raises:
+            ValueError: If the filename points outside output_dir
+        """
+        filepath = Path(output_dir) / filename
+        if not filepath.resolve().is_relative_to(Path(output_dir).resolve()):
+            raise ValueError(f"File name {filename!r} points outside {output_dir}")
+        return str(filepath)
+    
+    @staticmethod
+    def _check_manifest_size(manifest: Optional[Manifest], size: int) -> None:
+        """Raise ValueError if the server's size contradicts the manifest."""
+        if manifest is not None and manifest.size is not None and size:
+            if manifest.size != size:
+                raise ValueError(f"Server reports {size} bytes, manifest expects {manifest.size}")
+    
+    async def _apply_file_info(self, task: DownloadTask, info: FileInfo) -> None:
+        """
+        Complete a fast-start task with what its first response revealed.
+        
+        The filename is only replaced when it was derived from the URL, so
+        a name given by the caller or a manifest is kept.
+        """
+        self._check_manifest_size(task.manifest, info.size)
+        
+        if info.size:
+            task.total_size = info.size
+            task.metrics.total_size = info.size
+        # Ranges are only usable with a known size to plan them against
+        task.supports_ranges = info.supports_ranges and task.total_size > 0
+        task.etag, task.last_modified = info.etag, info.last_modified
+        task.resolved_url, task.url_expires_at = info.final_url, info.expires_at
+        
+        if task.filename == self._http_client.filename_from_url(task.url):
+            if info.filename != task.filename:
+                task.filepath = self._output_path(str(Path(task.filepath).parent), info.filename)
+                task.filename = info.filename
+        
+        if task.mirrors and task.supports_ranges:
+            task.mirrors = await self._validate_mirrors(task, task.mirrors)
+        else:
+            task.mirrors = []
+        task.fast_start = False
+        
+        self._emit_event(
+            "download_info",
+            {
+                "download_id": task.id,
+                "filename": task.filename,
+                "size": task.total_size,
+                "supports_ranges": task.supports_ranges,
+            },
+        )
+    
+    async def _validate_mirrors(self, task: DownloadTask, mirrors: List[str]) -> List[str]:
+        """
+        Probe mirrors concurrently and keep those serving the same file.
+        
+        A mirror must report the same size and support ranges; when both
+        sides send an ETag, they must match too, unless a manifest's hashes
+        verify the data instead. Rejected mirrors are reported with a
+        mirror_rejected event.
+        """
+        urls = [m for m in dict.fromkeys(mirrors) if m != task.url]
+        results = await asyncio.gather(
+            *(self._http_client.probe(m) for m in urls), return_exceptions=True
+        )
+        
+        accepted = []
+        for mirror, info in zip(urls, results):
+            if isinstance(info, Exception):
+                reason = str(info) or type(info).__name__
+            elif info.size != task.total_size:
+                reason = f"size {info.size} != {task.total_size}"
+            elif not info.supports_ranges:
+                reason = "no range support"
+            elif info.etag and task.etag and info.etag != task.etag and not task.manifest:
+                reason = f"ETag {info.etag} != {task.etag}"
+            else:
+                accepted.append(mirror)
+                continue
+            
+            self._emit_event(
+                "mirror_rejected",
+                {"download_id": task.id, "url": mirror, "reason": reason},
+            )
+        
+        return accepted
+    
     async def start_download(self, download_id: str) -> None:
         """
         Start a queued or paused download.
         
+        If max_active_downloads are already running, the download stays
+        QUEUED and is started by the scheduler as soon as a slot frees up.
+        
         Args:
             download_id: Download ID
         """
@@ -190,6 +611,18 @@ class AdaptiveDownloadEngine:
         if not task or task.status not in (DownloadStatus.QUEUED, DownloadStatus.PAUSED):
             return
         
+        if len(self._active_tasks) >= self.max_active_downloads:
+            task.status = DownloadStatus.QUEUED
+            if download_id not in self._pending:
+                self._pending.append(download_id)
+                self._emit_event("download_queued", {"download_id": download_id})
+            return
+        
+        self._launch(task)
+    
+    def _launch(self, task: DownloadTask) -> None:
+        """Run a download worker for a task."""
+        download_id = task.id
         task.status = DownloadStatus.ACTIVE
         self._emit_event("download_started", {"download_id": download_id})
         
@@ -197,6 +630,18 @@ class AdaptiveDownloadEngine:
         async_task = asyncio.create_task(self._download_worker(download_id))
         self._active_tasks[download_id] = async_task
     
+    def _schedule(self) -> None:
+        """Start waiting downloads while there are free slots."""
+        while self._pending and len(self._active_tasks) < self.max_active_downloads:
+            task = self.downloads.get(self._pending.popleft())
+            if task and task.status == DownloadStatus.QUEUED:
+                self._launch(task)
+    
+    def _connection_limit(self, task: DownloadTask) -> int:
+        """Connections a task may use: its own target, capped by a fair budget share."""
+        share = self.connection_budget // max(1, len(self._active_tasks))
+        return max(1, min(task.num_connections, share))
+    
     async def pause_download(self, download_id: str) -> None:
         """Pause an active download."""
         task = self.downloads.get(download_id)
@@ -223,6 +668,9 @@ class AdaptiveDownloadEngine:
         if not task:
             return
         
+        if download_id in self._pending:
+            self._pending.remove(download_id)
+        
         # Cancel if active
         async_task = self._active_tasks.get(download_id)
         if async_task:
@@ -259,6 +707,9 @@ class AdaptiveDownloadEngine:
         filename = task.filename
         filepath = task.filepath
         
+        if download_id in self._pending:
+            self._pending.remove(download_id)
+        
         # Cancel if active
         if task.status == DownloadStatus.ACTIVE:
             async_task = self._active_tasks.get(download_id)
@@ -285,6 +736,7 @@ class AdaptiveDownloadEngine:
         
         # Remove from downloads dict
         del self.downloads[download_id]
+        self.decision_engine.forget(download_id)
         
         self._emit_event(
             "download_deleted",
@@ -305,11 +757,36 @@ class AdaptiveDownloadEngine:
             download_id: Download ID
         """
         task = self.downloads[download_id]
-        writer = AsyncFileWriter(task.filepath, task.total_size)
+        writer: Optional[AsyncFileWriter] = None
+        first_response = None
         
         try:
-            # Initialize file (may resume) and get completed chunks
-            bytes_downloaded, completed_chunks = await writer.initialize()
+            if task.fast_start:
+                # The first data request doubles as the probe
+                try:
+                    info, first_response = await self._http_client.open_range(
+                        task.url, 0, self.FAST_START_BYTES - 1
+                    )
+                except RangeNotSupportedError as e:
+                    # The client now remembers the host as range-incapable,
+                    # so a regular probe describes it for one stream
+                    info = await self._http_client.probe(task.url)
+                    info.supports_ranges = False
+                    self._emit_event(
+                        "ranges_unsupported", {"download_id": download_id, "error": str(e)}
+                    )
+                await self._apply_file_info(task, info)
+            
+            writer = AsyncFileWriter(
+                task.filepath,
+                task.total_size,
+                task.hash_algorithm,
+                etag=task.etag,
+                last_modified=task.last_modified,
+            )
+            
+            # Initialize file (may resume) and get completed ranges
+            bytes_downloaded, _ = await writer.initialize()
             task.metrics.bytes_downloaded = bytes_downloaded
             
             # Auto-scale chunk size based on file size
@@ -320,11 +797,45 @@ class AdaptiveDownloadEngine:
             else:
                 task.chunk_size = 1 * 1024 * 1024  # 1MB
             
+            streamed = False
+            if first_response is not None:
+                body = first_response.content.iter_chunked(self._http_client.STREAM_BUFFER_SIZE)
+                if first_response.status == 200:
+                    # Range ignored: the body is the whole file
+                    await self._download_full(task, writer, body)
+                    streamed = True
+                elif task.supports_ranges:
+                    # Keep the first range; only the rest is fanned out
+                    _, rtt_ms = await self._write_sequential(task, writer, body)
+                    task.metrics.update(writer.completed.total, rtt_ms)
+                first_response.release()
+                first_response = None
+            
             if task.supports_ranges:
-                await self._download_multipart(task, writer, completed_chunks)
-            else:
+                checkpointer = asyncio.create_task(self._checkpoint_loop(writer))
+                try:
+                    await self._download_multipart(task, writer)
+                except RangeNotSupportedError as e:
+                    # Nothing of the ignored-range body was written; start
+                    # over on one stream instead
+                    task.supports_ranges = False
+                    task.mirrors = []
+                    self._emit_event(
+                        "ranges_unsupported", {"download_id": download_id, "error": str(e)}
+                    )
+                finally:
+                    checkpointer.cancel()
+            if not task.supports_ranges and not streamed:
                 await self._download_full(task, writer)
             
+            # Hashed along the way; only the tail is left to read
+            task.digest = await writer.finish_hash()
+            if task.expected_digest and task.digest != task.expected_digest:
+                raise ValueError(
+                    f"{task.hash_algorithm} mismatch: expected {task.expected_digest}, "
+                    f"got {task.digest}"
+                )
+            
             # Finalize
             await writer.finalize()
             task.status = DownloadStatus.COMPLETED
@@ -335,19 +846,16 @@ class AdaptiveDownloadEngine:
                     "download_id": download_id,
                     "filepath": task.filepath,
                     "size": task.total_size,
+                    "hash_algorithm": task.hash_algorithm,
+                    "digest": task.digest,
                 },
             )
         
         except asyncio.CancelledError:
-            # Save complete state for resume: chunk map, metrics, parameters
-            chunk_map = getattr(writer, '_completed_chunks', {})
-            metadata = {
-                'bytes_downloaded': task.metrics.bytes_downloaded,
-                'chunks': chunk_map,
-                'chunk_size': task.chunk_size,
-                'num_connections': task.num_connections,
-            }
-            await writer.save_metadata(task.metrics.bytes_downloaded, chunk_map)
+            # Save completed ranges (including partial ones) for resume
+            if writer is not None:
+                task.metrics.bytes_downloaded = writer.completed.total
+                await writer.save_metadata()
             raise
         
         except Exception as e:
@@ -360,96 +868,552 @@ class AdaptiveDownloadEngine:
             )
         
         finally:
+            if first_response is not None:
+                first_response.release()
+            if writer is not None:
+                await writer.close()
+            if self._http_client is not None:
+                self._http_client.remember_host(task.url)
+            await self._save_cache()
             if download_id in self._active_tasks:
                 del self._active_tasks[download_id]
-    
-    async def _download_multipart(
-        self, task: DownloadTask, writer: AsyncFileWriter, completed_chunks: Dict[int, int] = None
-    ) -> None:
-        """Download using multiple connections."""
-        if completed_chunks is None:
-            completed_chunks = {}
-        
-        # Track completed chunks for resume
-        writer._completed_chunks = completed_chunks.copy()
-        
-        remaining = task.total_size - task.metrics.bytes_downloaded
-        
-        while remaining > 0:
-            # Check for adaptive decisions
-            decisions = self.decision_engine.analyze(
-                task.metrics,
-                task.chunk_size,
-                task.num_connections,
-                task.supports_ranges,
-            )
             
-            # Apply decisions
-            for decision in decisions:
-                await self._apply_decision(task, decision)
-            
-            # Create chunk tasks - skip already completed chunks
-            chunks_to_download = []
-            offset = 0
+            # Hand the freed slot to the next waiting download
+            if not self._stopped:
+                self._schedule()
+    
+    async def _checkpoint_loop(self, writer: AsyncFileWriter) -> None:
+        """
+        Periodically persist resume metadata in the background.
+        
+        A checkpoint is written once CHECKPOINT_INTERVAL has passed with new
+        data, or as soon as CHECKPOINT_BYTES arrived since the last one, so an
+        unclean shutdown loses at most one checkpoint's worth of progress.
+        """
+        saved_bytes = writer.completed.total
+        saved_time = time.time()
+        
+        while True:
+            await asyncio.sleep(self.SUPERVISOR_INTERVAL)
             
-            while offset < task.total_size:
-                chunk_size = min(task.chunk_size, task.total_size - offset)
+            new_bytes = writer.completed.total - saved_bytes
+            elapsed = time.time() - saved_time
+            if new_bytes >= self.CHECKPOINT_BYTES or (
+                new_bytes and elapsed >= self.CHECKPOINT_INTERVAL
+            ):
+                saved_bytes = writer.completed.total
+                saved_time = time.time()
+                try:
+                    await writer.save_metadata()
+                except OSError:
+                    pass  # Keep downloading; the next checkpoint may succeed
+    
+    async def _download_multipart(self, task: DownloadTask, writer: AsyncFileWriter) -> None:
+        """
+        Download using a pool of long-lived connection workers.
+        
+        Workers pull ranges from a shared queue as soon as they finish the
+        previous one, so a slow range never stalls the other connections.
+        The pool is resized on the fly when ``task.num_connections`` or the
+        task's share of the engine connection budget changes.
+        """
+        state = _MultipartState(
+            ranges=asyncio.Queue(),
+            mirrors=[_Mirror(url) for url in [task.url, *task.mirrors]],
+        )
+        workers: Set[asyncio.Task] = set()
+        
+        try:
+            while True:
+                # Check for adaptive decisions
+                decisions = self.decision_engine.analyze(
+                    task.metrics,
+                    task.chunk_size,
+                    task.num_connections,
+                    task.supports_ranges,
+                    host=urlparse(task.url).netloc,
+                )
+                
+                # Apply decisions
+                for decision in decisions:
+                    await self._apply_decision(task, decision)
+                    if decision.decision_type == DecisionType.DECREASE_CONNECTIONS:
+                        state.connections_reduced = True
+                
+                # Surface the first worker failure
+                for worker in [w for w in workers if w.done()]:
+                    workers.discard(worker)
+                    worker.result()
+                
+                self._plan_ranges(task, writer, state)
+                if state.is_done():
+                    # Check pieces no single fetch completed, e.g. resumed data
+                    await self._verify_pieces(task, writer, state, 0, task.total_size)
+                    if state.is_done():
+                        break  # All chunks downloaded and verified
+                
+                # Grow the pool up to the current connection target; surplus
+                # workers retire on their own after finishing their range
+                while len(workers) < self._connection_limit(task) and (
+                    state.has_ready_work() or self._find_straggler(state)
+                ):
+                    workers.add(
+                        asyncio.create_task(self._chunk_worker(task, writer, state, workers))
+                    )
                 
-                # Check if this chunk is already downloaded
-                if offset not in writer._completed_chunks:
-                    chunks_to_download.append((offset, chunk_size))
-                    
-                    # Limit concurrent downloads
-                    if len(chunks_to_download) >= task.num_connections:
-                        break
+                self._hedge_stragglers(task, writer, state, workers)
                 
-                offset += chunk_size
+                # Track re-resolved redirects of expiring URLs
+                task.resolved_url, task.url_expires_at = self._http_client.resolution(task.url)
+                
+                # Emit progress, including partially fetched ranges
+                task.metrics.bytes_downloaded = writer.completed.total
+                task.metrics.sample()
+                self._emit_progress(task)
+                
+                self._track_best_connections(task, state)
+                
+                if workers:
+                    await asyncio.wait(
+                        workers,
+                        timeout=self.SUPERVISOR_INTERVAL,
+                        return_when=asyncio.FIRST_EXCEPTION,
+                    )
+                else:
+                    # Only backed-off retries left
+                    await asyncio.sleep(self.SUPERVISOR_INTERVAL)
+        finally:
+            for worker in workers:
+                worker.cancel()
+            if workers:
+                await asyncio.gather(*workers, return_exceptions=True)
+        
+        connections = state.best_connections or None
+        if (
+            connections is not None
+            and connections < DownloadTask.num_connections  # the default
+            and not (state.connections_reduced or state.failures)
+        ):
+            # Starting below the default needs evidence, not just a slow host
+            connections = None
+        self._http_client.remember_host(task.url, connections)
+        self._emit_progress(task)
+    
+    def _track_best_connections(self, task: DownloadTask, state: _MultipartState) -> None:
+        """
+        Remember the connection target that sustained the highest speed.
+        
+        A target only counts once held for CONNECTIONS_STEADY_AFTER, and only
+        while ranges are waiting for a worker: in the end game workers retire
+        or split stragglers, so the speed says little about the target.
+        """
+        now = time.time()
+        if task.num_connections != state.steady_connections:
+            state.steady_connections, state.steady_since = task.num_connections, now
+            return
+        held = now - state.steady_since
+        if not state.has_ready_work() or held < self.CONNECTIONS_STEADY_AFTER:
+            return
+        if task.metrics.current_speed > state.best_speed:
+            state.best_speed = task.metrics.current_speed
+            state.best_connections = task.num_connections
+    
+    def _emit_progress(self, task: DownloadTask) -> None:
+        """Emit a progress event for a task."""
+        self._emit_event(
+            "download_progress",
+            {
+                "download_id": task.id,
+                "bytes_downloaded": task.metrics.bytes_downloaded,
+                "total_size": task.total_size,
+                "speed": task.metrics.current_speed,
+                "eta": task.metrics.eta_seconds,
+            },
+        )
+    
+    def _plan_ranges(
+        self, task: DownloadTask, writer: AsyncFileWriter, state: _MultipartState
+    ) -> None:
+        """
+        Top up the shared range queue to one pending range per connection.
+        
+        Ranges are cut lazily from the gaps in ``writer.completed`` at the
+        current ``task.chunk_size``, so chunk size decisions take effect for
+        everything not yet planned and never misalign with resumed data.
+        """
+        while state.ranges.qsize() < task.num_connections and not state.exhausted:
+            gap = writer.completed.next_missing(state.next_offset, task.total_size)
+            if gap is None:
+                state.exhausted = True
+                break
             
-            if not chunks_to_download:
-                break  # All chunks downloaded
+            offset, gap_end = gap
+            chunk_size = min(task.chunk_size, gap_end - offset)
+            state.next_offset = offset + chunk_size
+            state.ranges.put_nowait((offset, chunk_size))
+    
+    async def _chunk_worker(
+        self,
+        task: DownloadTask,
+        writer: AsyncFileWriter,
+        state: _MultipartState,
+        workers: Set[asyncio.Task],
+    ) -> None:
+        """
+        Long-lived connection worker pulling ranges until none are ready.
+        
+        A range that fails is moved to the retry heap with exponential
+        backoff while the other workers keep going; the worker only raises
+        once the download's retry budget is used up or the error is not
+        retryable (e.g. a local disk error).
+        """
+        while True:
+            # Retire if the connection target or budget share was lowered
+            if len(workers) > self._connection_limit(task):
+                workers.discard(asyncio.current_task())
+                return
             
-            # Download chunks in parallel
-            chunk_tasks = [
-                self._download_and_write_chunk(task, writer, offset, size)
-                for offset, size in chunks_to_download
-            ]
+            # Ranges whose backoff has elapsed go first
+            if state.retries and state.retries[0][0] <= time.time():
+                _, offset, size, attempt = heapq.heappop(state.retries)
+            else:
+                self._plan_ranges(task, writer, state)
+                try:
+                    offset, size = state.ranges.get_nowait()
+                except asyncio.QueueEmpty:
+                    # End game: take over the tail of the slowest range
+                    straggler = self._find_straggler(state)
+                    if straggler is None:
+                        workers.discard(asyncio.current_task())
+                        return
+                    offset, size = self._split_range(straggler)
+                attempt = 0
             
-            await asyncio.gather(*chunk_tasks)
+            rng = _InFlightRange(
+                start=offset, end=offset + size, position=offset, mirror=self._pick_mirror(state)
+            )
+            state.in_flight.append(rng)
+            try:
+                await self._run_fetch(task, writer, rng)
+                await self._verify_pieces(task, writer, state, offset, rng.end)
+            except RangeNotSupportedError as e:
+                # Only the primary source switches the download to a single
+                # stream; a mirror ignoring Range is dropped
+                if rng.mirror.url == task.url:
+                    raise
+                if rng.mirror in state.mirrors:
+                    state.mirrors.remove(rng.mirror)
+                    self._emit_event(
+                        "mirror_rejected",
+                        {"download_id": task.id, "url": rng.mirror.url, "reason": str(e)},
+                    )
+                heapq.heappush(state.retries, (time.time(), offset, rng.end - offset, attempt))
+            except Exception as e:
+                state.failures += 1
+                if (
+                    not self._http_client.is_retryable_error(e)
+                    or state.failures > self.chunk_retry_budget
+                ):
+                    raise
+                
+                # Exponential backoff with jitter; a tail split off in the
+                # meantime belongs to another worker now
+                backoff = min(2 ** attempt, self.MAX_RETRY_BACKOFF) + (time.time() % 1)
+                size = rng.end - offset
+                heapq.heappush(
+                    state.retries, (time.time() + backoff, offset, size, attempt + 1)
+                )
+                self._emit_event(
+                    "chunk_retry",
+                    {
+                        "download_id": task.id,
+                        "url": rng.mirror.url,
+                        "offset": offset,
+                        "size": size,
+                        "attempt": attempt + 1,
+                        "error": str(e),
+                    },
+                )
+            finally:
+                state.in_flight.remove(rng)
+    
+    async def _verify_pieces(
+        self,
+        task: DownloadTask,
+        writer: AsyncFileWriter,
+        state: _MultipartState,
+        start: int,
+        end: int,
+    ) -> None:
+        """
+        Check manifest pieces overlapping [start, end) that are now complete.
+        
+        Pieces are hashed from disk in a worker thread. A corrupt piece is
+        dropped from ``writer.completed`` and queued as a retry, so only that
+        piece is fetched again; each one counts against the retry budget.
+        """
+        manifest = task.manifest
+        if manifest is None or not manifest.piece_hashes or not manifest.piece_length:
+            return
+        
+        length = manifest.piece_length
+        last = min(len(manifest.piece_hashes), -(-min(end, task.total_size) // length))
+        for index in range(start // length, last):
+            piece_start = index * length
+            piece_end = min(piece_start + length, task.total_size)
+            if index in state.verified or not writer.completed.contains(piece_start, piece_end):
+                continue
             
-            remaining = task.total_size - task.metrics.bytes_downloaded
+            state.verified.add(index)
+            digest = await writer.hash_range(
+                piece_start, piece_end - piece_start, manifest.piece_hash_type
+            )
+            if digest == manifest.piece_hashes[index]:
+                continue
             
-            # Emit progress
+            state.verified.discard(index)
+            writer.discard_range(piece_start, piece_end)
+            state.failures += 1
             self._emit_event(
-                "download_progress",
+                "piece_corrupt",
                 {
                     "download_id": task.id,
-                    "bytes_downloaded": task.metrics.bytes_downloaded,
-                    "total_size": task.total_size,
-                    "speed": task.metrics.current_speed,
-                    "eta": task.metrics.eta_seconds,
+                    "index": index,
+                    "offset": piece_start,
+                    "size": piece_end - piece_start,
                 },
             )
+            if state.failures > self.chunk_retry_budget:
+                raise ValueError(f"Piece {index} failed verification, retry budget exhausted")
+            heapq.heappush(
+                state.retries, (time.time(), piece_start, piece_end - piece_start, 0)
+            )
     
-    async def _download_and_write_chunk(
-        self, task: DownloadTask, writer: AsyncFileWriter, offset: int, size: int
+    def _find_straggler(self, state: _MultipartState) -> Optional[_InFlightRange]:
+        """
+        Pick the in-flight range expected to finish last.
+        
+        Only ranges with at least ENDGAME_MIN_SPLIT bytes left qualify; ranges
+        that have not received anything yet count as slowest.
+        """
+        now = time.time()
+        straggler = None
+        straggler_eta = -1.0
+        
+        for rng in state.in_flight:
+            remaining = rng.end - rng.position
+            if remaining < self.ENDGAME_MIN_SPLIT or rng.partner is not None:
+                continue
+            
+            fetched = rng.position - rng.start
+            elapsed = now - rng.started_at
+            rate = fetched / elapsed if fetched and elapsed > 0 else 0.0
+            eta = remaining / rate if rate else float("inf")
+            if eta > straggler_eta:
+                straggler, straggler_eta = rng, eta
+        
+        return straggler
+    
+    async def _run_fetch(
+        self, task: DownloadTask, writer: AsyncFileWriter, rng: _InFlightRange
     ) -> None:
-        """Download and write a single chunk."""
+        """
+        Fetch a range in its own task so a hedged partner can cancel it.
+        
+        Returns quietly if the partner finished first; when this copy wins,
+        the partner is truncated and cancelled.
+        """
+        mirror = rng.mirror
+        mirror.active += 1
+        rng.fetch = asyncio.ensure_future(self._download_and_write_chunk(task, writer, rng))
+        try:
+            await asyncio.wait({rng.fetch})
+        finally:
+            rng.fetch.cancel()
+            mirror.active -= 1
+        
+        if rng.fetch.cancelled():
+            return  # The partner request won the race
+        
         try:
-            end = offset + size - 1
-            data, rtt_ms = await self._http_client.download_chunk(
-                task.url, offset, end
+            rng.fetch.result()
+        except Exception:
+            # Fail over: back off from this mirror for a while
+            mirror.failures += 1
+            mirror.disabled_until = time.time() + min(
+                2 ** mirror.failures, self.MAX_RETRY_BACKOFF
             )
+            raise
+        
+        mirror.failures = 0
+        fetched = rng.position - rng.start
+        elapsed = time.time() - rng.started_at
+        if fetched and elapsed > 0:
+            rate = fetched / elapsed
+            if mirror.throughput:
+                alpha = self._http_client.THROUGHPUT_SMOOTHING
+                rate = alpha * rate + (1 - alpha) * mirror.throughput
+            mirror.throughput = rate
+        
+        partner = rng.partner
+        if partner is not None and partner.fetch is not None and not partner.fetch.done():
+            partner.end = partner.position
+            partner.fetch.cancel()
+            if rng.is_hedge:
+                self.stats["hedge_wins"] += 1
+    
+    def _hedge_stragglers(
+        self,
+        task: DownloadTask,
+        writer: AsyncFileWriter,
+        state: _MultipartState,
+        workers: Set[asyncio.Task],
+    ) -> None:
+        """Start a duplicate request for ranges running well past their expected finish."""
+        if not self.hedge_requests:
+            return
+        
+        throughput = self._http_client.connection_throughput(task.url)
+        if not throughput:
+            return
+        
+        hedges = sum(1 for rng in state.in_flight if rng.is_hedge)
+        now = time.time()
+        
+        for rng in list(state.in_flight):
+            if hedges >= self.MAX_HEDGES:
+                break
+            if rng.partner is not None or rng.end - rng.position < self.HEDGE_MIN_BYTES:
+                continue
             
-            # Write chunk (uses single file descriptor)
-            await writer.write_chunk(offset, data)
+            expected = (rng.end - rng.start) / throughput
+            if now - rng.started_at < max(self.HEDGE_MIN_SECONDS, expected * self.HEDGE_AFTER):
+                continue
             
-            # Mark chunk as completed
-            writer._completed_chunks[offset] = len(data)
+            hedge = _InFlightRange(
+                start=rng.position,
+                end=rng.end,
+                position=rng.position,
+                mirror=self._pick_mirror(state, exclude=rng.mirror),
+                partner=rng,
+                is_hedge=True,
+            )
+            rng.partner = hedge
+            hedges += 1
+            self.stats["hedged_requests"] += 1
+            workers.add(
+                asyncio.create_task(self._hedge_worker(task, writer, state, workers, hedge))
+            )
+    
+    async def _hedge_worker(
+        self,
+        task: DownloadTask,
+        writer: AsyncFileWriter,
+        state: _MultipartState,
+        workers: Set[asyncio.Task],
+        hedge: _InFlightRange,
+    ) -> None:
+        """Race a duplicate request against a straggling range."""
+        state.in_flight.append(hedge)
+        try:
+            await self._run_fetch(task, writer, hedge)
+        except Exception:
+            pass  # The original request is still running
+        else:
+            await self._verify_pieces(task, writer, state, hedge.start, hedge.end)
+        finally:
+            state.in_flight.remove(hedge)
+            workers.discard(asyncio.current_task())
+            
+            # A failed hedge leaves the original free to be hedged again
+            original = hedge.partner
+            if original is not None and original.partner is hedge:
+                original.partner = None
+    
+    def _pick_mirror(
+        self, state: _MultipartState, exclude: Optional[_Mirror] = None
+    ) -> _Mirror:
+        """
+        Choose the source for the next range.
+        
+        Ranges are spread in proportion to each mirror's measured throughput;
+        mirrors not measured yet count as fast so they get tried. Mirrors
+        backing off after a failure are skipped while others are available.
+        """
+        now = time.time()
+        healthy = [m for m in state.mirrors if m.disabled_until <= now]
+        candidates = [m for m in healthy if m is not exclude] or healthy
+        if not candidates:
+            return min(state.mirrors, key=lambda m: m.disabled_until)
+        
+        fastest = max(m.throughput for m in candidates) or 1.0
+        return min(candidates, key=lambda m: (m.active + 1) / (m.throughput or fastest))
+    
+    def _split_range(self, rng: _InFlightRange) -> Tuple[int, int]:
+        """
+        Hand the second half of a range's remaining bytes to the caller.
+        
+        The original fetch stops once it reaches its new, lower end.
+        
+        Returns:
+            (offset, size) of the split-off tail
+        """
+        middle = rng.position + (rng.end - rng.position) // 2
+        tail = (middle, rng.end - middle)
+        rng.end = middle
+        return tail
+    
+    async def _download_and_write_chunk(
+        self, task: DownloadTask, writer: AsyncFileWriter, rng: _InFlightRange
+    ) -> None:
+        """
+        Stream a single range to disk, buffer by buffer.
+        
+        Every written buffer is recorded in ``writer.completed``, so a retry
+        (or a resume after restart) only requests the part of the range that
+        is still missing. The fetch stops early when ``rng.end`` is lowered
+        because its tail was handed to another worker.
+        """
+        try:
+            rtt_ms = task.metrics.rtt_ms
+            
+            while True:
+                gap = writer.completed.next_missing(rng.position, rng.end)
+                if gap is None:
+                    break
+                
+                start, end = gap
+                rng.position = start
+                start_time = time.time()
+                
+                stream = self._http_client.stream_chunk(rng.mirror.url, start, end - 1)
+                async with aclosing(stream):
+                    async for data in stream:
+                        if rng.position == start:
+                            # Time to first byte
+                            rtt_ms = (time.time() - start_time) * 1000
+                        
+                        # Drop whatever lies past a truncated end
+                        data = data[: max(0, rng.end - rng.position)]
+                        if data:
+                            # Write each buffer at its place in the file
+                            await writer.write_chunk(rng.position, data)
+                            covered = writer.completed.total
+                            writer.completed.add(rng.position, rng.position + len(data))
+                            rng.position += len(data)
+                            
+                            # Bytes a hedged partner already wrote are not new
+                            new_bytes = writer.completed.total - covered
+                            if new_bytes:
+                                task.metrics.record_bytes(new_bytes)
+                        
+                        # Stop early only when the tail went to another worker;
+                        # a complete stream is left to finish on its own
+                        if rng.position >= rng.end and rng.end < end:
+                            break
             
             # Update metrics
-            task.metrics.update(
-                task.metrics.bytes_downloaded + len(data), rtt_ms
-            )
+            task.metrics.update(writer.completed.total, rtt_ms)
         
         except Exception as e:
             task.metrics.increment_errors()
@@ -458,27 +1422,81 @@ class AdaptiveDownloadEngine:
             raise
     
     async def _download_full(
-        self, task: DownloadTask, writer: AsyncFileWriter
+        self,
+        task: DownloadTask,
+        writer: AsyncFileWriter,
+        body: Optional[AsyncIterator[bytes]] = None,
     ) -> None:
-        """Download entire file (no range support)."""
-        data, rtt_ms = await self._http_client.download_full(task.url)
+        """
+        Download entire file over one connection (no range support).
         
-        # Write to file
-        await writer.write_chunk(0, data)
+        Data is written sequentially as it arrives, so memory stays bounded
+        by the stream buffer size and progress is reported along the way.
+        
+        Args:
+            task: Download task
+            writer: File writer
+            body: Already opened stream of the whole file (defaults to a
+                new request)
+        """
+        # Without ranges the transfer always restarts from the beginning
+        task.metrics.bytes_downloaded = 0
+        writer.completed = RangeSet()
+        position, rtt_ms = await self._write_sequential(
+            task, writer, body or self._http_client.stream_full(task.url)
+        )
+        
+        # Size may be unknown up front for servers without Content-Length
+        if not task.total_size:
+            task.total_size = position
+            task.metrics.total_size = position
         
         # Update metrics
-        task.metrics.update(len(data), rtt_ms)
+        task.metrics.update(position, rtt_ms)
+        self._emit_progress(task)
+    
+    async def _write_sequential(
+        self, task: DownloadTask, writer: AsyncFileWriter, body: AsyncIterator[bytes]
+    ) -> Tuple[int, float]:
+        """
+        Write a response body to the file from offset 0 as it arrives.
         
-        self._emit_event(
-            "download_progress",
-            {
-                "download_id": task.id,
-                "bytes_downloaded": len(data),
-                "total_size": task.total_size,
-                "speed": task.metrics.current_speed,
-                "eta": 0,
-            },
-        )
+        Returns:
+            Tuple of (bytes written, time to first byte in ms)
+        """
+        position = 0
+        rtt_ms = 0.0
+        start_time = time.time()
+        
+        reporter = asyncio.create_task(self._progress_loop(task))
+        try:
+            async for data in body:
+                if position == 0:
+                    # Time to first byte
+                    rtt_ms = (time.time() - start_time) * 1000
+                    task.metrics.rtt_ms = rtt_ms
+                
+                await writer.write_chunk(position, data)
+                writer.completed.add(position, position + len(data))
+                position += len(data)
+                task.metrics.record_bytes(len(data))
+                task.metrics.bytes_downloaded = position
+        finally:
+            reporter.cancel()
+        
+        return position, rtt_ms
+    
+    async def _progress_loop(self, task: DownloadTask) -> None:
+        """
+        Periodically sample throughput and report progress of one stream.
+        
+        Driven by a timer rather than by arriving data, so a stalled stream
+        shows up as zero-throughput samples instead of a frozen speed.
+        """
+        while True:
+            await asyncio.sleep(self.SUPERVISOR_INTERVAL)
+            task.metrics.sample()
+            self._emit_progress(task)
     
     async def _apply_decision(self, task: DownloadTask, decision: Decision) -> None:
         """Apply an adaptive decision to a task."""
@@ -509,6 +1527,46 @@ class AdaptiveDownloadEngine:
             },
         )
     
+    async def verify_file(
+        self,
+        path: str,
+        algorithm: str = "sha256",
+        expected_digest: Optional[str] = None,
+        segment_size: int = SEGMENT_SIZE,
+        workers: Optional[int] = None,
+    ) -> VerificationResult:
+        """
+        Verify a file on disk, e.g. one downloaded without incremental hashing.
+        
+        Segments are hashed in a process pool and combined into a tree
+        digest while a sequential mmap pass computes the plain digest.
+        
+        Args:
+            path: File to verify
+            algorithm: "crc32c" or any hashlib algorithm name
+            expected_digest: Optional plain or tree digest to compare against
+            segment_size: Bytes hashed per worker task
+            workers: Worker processes (defaults to the CPU count)
+        
+        Returns:
+            VerificationResult with both digests
+        """
+        result = await asyncio.to_thread(
+            verify_file, path, algorithm, segment_size, workers
+        )
+        
+        self._emit_event(
+            "file_verified",
+            {
+                "path": result.path,
+                "algorithm": algorithm,
+                "digest": result.digest,
+                "tree_digest": result.tree_digest,
+                "matches": result.matches(expected_digest) if expected_digest else None,
+            },
+        )
+        return result
+    
     def get_download(self, download_id: str) -> Optional[DownloadTask]:
         """Get download task by ID."""
         return self.downloads.get(download_id)
@@ -516,3 +1574,12 @@ class AdaptiveDownloadEngine:
     def get_downloads_by_status(self, status: DownloadStatus) -> List[DownloadTask]:
         """Get all downloads with a specific status."""
         return [d for d in self.downloads.values() if d.status == status]
+    
+    def get_stats(self) -> Dict[str, int]:
+        """
+        Get the engine's and HTTP client's counters.
+        
+        Includes hedged_requests and hedge_wins of the engine, and e.g.
+        connections_recycled and ranges_ignored of the client.
+        """
+        return {**self.stats, **self._client_stats}
@@ -0,0 +1,229 @@
+"""
+Download manifests: Metalink (RFC 5854) and a simple JSON format.
+"""
+
+import hashlib
+import json
+import xml.etree.ElementTree as ET
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+
+@dataclass
+class Manifest:
+    """A single file described by a manifest: sources, size and hashes."""
+    
+    urls: List[str]
+    name: Optional[str] = None
+    size: Optional[int] = None
+    
+    # Whole-file hash, hashlib algorithm name (e.g. "sha256") and hex digest
+    hash_type: Optional[str] = None
+    hash_value: Optional[str] = None
+    
+    # Optional per-piece hashes of piece_length bytes each
+    piece_length: Optional[int] = None
+    piece_hash_type: Optional[str] = None
+    piece_hashes: List[str] = field(default_factory=list)
+
+
+# Whole-file hashes in order of preference, weakest first
+_HASH_STRENGTH = ("md5", "sha1", "sha224", "sha256", "sha384", "sha512")
+
+
+def normalize_hash_type(hash_type: str) -> str:
+    """
+    Map a manifest hash name (e.g. "sha-256") to a hashlib algorithm name.
+    
+    Raises:
+        ValueError: If the algorithm is not available
+    """
+    name = hash_type.lower().replace("-", "")
+    if name not in hashlib.algorithms_available:
+        raise ValueError(f"Unsupported hash type: {hash_type}")
+    return name
+
+
+def _hash_rank(hash_type: str) -> int:
+    """Preference of a hashlib algorithm name (0 for unranked ones)."""
+    return _HASH_STRENGTH.index(hash_type) + 1 if hash_type in _HASH_STRENGTH else 0
+
+
+def _safe_name(name: Optional[str]) -> Optional[str]:
+    """
+    Check that a manifest file name is a plain file name.
+    
+    RFC 5854 forbids directory traversal in names; since the name becomes
+    the output filename, path separators are rejected too. Dots inside a
+    name (e.g. "pkg-1.0..rc.tar.gz") are fine.
+    
+    Raises:
+        ValueError: If the name is absolute, "." or "..", or has separators
+    """
+    if not name:
+        return None
+    if (
+        "/" in name
+        or "\\" in name
+        or Path(name).is_absolute()
+        or name.strip() in ("", ".", "..")
+    ):
+        raise ValueError(f"Unsafe file name in manifest: {name!r}")
+    return name
+
+
+def _text(element: ET.Element) -> str:
+    """
+    Stripped text of an element.
+    
+    Raises:
+        ValueError: If the element is empty
+    """
+    text = (element.text or "").strip()
+    if not text:
+        raise ValueError(f"Empty <{_local(element.tag)}> element")
+    return text
+
+
+def _local(tag: str) -> str:
+    """Strip the XML namespace from a tag."""
+    return tag.rsplit("}", 1)[-1]
+
+
+def _children(element: ET.Element, name: str) -> List[ET.Element]:
+    """Direct children with the given local name, in any namespace."""
+    return [child for child in element if _local(child.tag) == name]
+
+
+def parse_metalink(text: str) -> List[Manifest]:
+    """
+    Parse a Metalink 4 (RFC 5854) document.
+    
+    Args:
+        text: XML document
+    
+    Returns:
+        One Manifest per <file> element
+    
+    Raises:
+        ValueError: On malformed documents
+    """
+    try:
+        root = ET.fromstring(text)
+    except ET.ParseError as e:
+        raise ValueError(f"Invalid Metalink document: {e}") from e
+    
+    manifests = []
+    for file_el in root.iter():
+        if _local(file_el.tag) != "file":
+            continue
+        
+        # Lower priority value means preferred
+        urls = sorted(
+            _children(file_el, "url"),
+            key=lambda el: int(el.get("priority", "999999")),
+        )
+        manifest = Manifest(
+            urls=[el.text.strip() for el in urls if el.text and el.text.strip()],
+            name=_safe_name(file_el.get("name")),
+        )
+        
+        for size_el in _children(file_el, "size"):
+            manifest.size = int(_text(size_el))
+        
+        # Prefer the strongest whole-file hash we can compute
+        for hash_el in _children(file_el, "hash"):
+            try:
+                hash_type = normalize_hash_type(hash_el.get("type", ""))
+            except ValueError:
+                continue
+            if manifest.hash_type is None or _hash_rank(hash_type) > _hash_rank(
+                manifest.hash_type
+            ):
+                manifest.hash_type = hash_type
+                manifest.hash_value = _text(hash_el).lower()
+        
+        for pieces_el in _children(file_el, "pieces"):
+            manifest.piece_length = int(pieces_el.get("length", "0"))
+            manifest.piece_hash_type = normalize_hash_type(pieces_el.get("type", ""))
+            manifest.piece_hashes = [
+                el.text.strip().lower() for el in _children(pieces_el, "hash") if el.text
+            ]
+        
+        if not manifest.urls:
+            raise ValueError(f"No URLs for file {manifest.name!r}")
+        manifests.append(manifest)
+    
+    if not manifests:
+        raise ValueError("Metalink document lists no files")
+    return manifests
+
+
+def _manifest_from_dict(data: Dict[str, Any]) -> Manifest:
+    """Build a Manifest from one JSON file entry."""
+    urls = data.get("urls") or ([data["url"]] if data.get("url") else [])
+    if not urls:
+        raise ValueError(f"No URLs for file {data.get('name')!r}")
+    
+    manifest = Manifest(urls=list(urls), name=_safe_name(data.get("name")), size=data.get("size"))
+    
+    file_hash = data.get("hash")
+    if file_hash:
+        manifest.hash_type = normalize_hash_type(file_hash["type"])
+        manifest.hash_value = file_hash["value"].lower()
+    
+    pieces = data.get("pieces")
+    if pieces:
+        manifest.piece_length = int(pieces["length"])
+        manifest.piece_hash_type = normalize_hash_type(pieces["type"])
+        manifest.piece_hashes = [h.lower() for h in pieces["hashes"]]
+    
+    return manifest
+
+
+def parse_json_manifest(text: str) -> List[Manifest]:
+    """
+    Parse a JSON manifest.
+    
+    The document is a file entry, a list of them, or {"files": [...]}.
+    A file entry looks like::
+        
+        {
+            "name": "image.iso",
+            "size": 1048576,
+            "urls": ["https://a.example/image.iso", "https://b.example/image.iso"],
+            "hash": {"type": "sha256", "value": "<hex>"},
+            "pieces": {"length": 262144, "type": "sha256", "hashes": ["<hex>", ...]}
+        }
+    
+    Raises:
+        ValueError: On malformed documents
+    """
+    try:
+        data = json.loads(text)
+    except json.JSONDecodeError as e:
+        raise ValueError(f"Invalid JSON manifest: {e}") from e
+    
+    if isinstance(data, dict):
+        data = data.get("files", [data])
+    try:
+        return [_manifest_from_dict(entry) for entry in data]
+    except (KeyError, TypeError) as e:
+        raise ValueError(f"Invalid JSON manifest entry: {e}") from e
+
+
+def load_manifest(path: str) -> List[Manifest]:
+    """
+    Load a Metalink or JSON manifest from disk, detecting the format.
+    
+    Args:
+        path: Manifest file path
+    
+    Returns:
+        Manifests for the files it describes
+    """
+    text = Path(path).expanduser().read_text(encoding="utf-8")
+    if text.lstrip().startswith("<"):
+        return parse_metalink(text)
+    return parse_json_manifest(text)
@@ -2,10 +2,12 @@
 Real-time download metrics tracking.
 """
 
+import itertools
+import math
 import time
 from collections import deque
 from dataclasses import dataclass, field
-from typing import Deque
+from typing import Deque, Optional
 
 
 @dataclass
@@ -29,50 +31,124 @@ class DownloadMetrics:
     error_count: int = 0
     retry_count: int = 0
     
-    # History for graphs (last 60 samples)
+    # History for graphs (last 60 samples of SAMPLE_INTERVAL each); running
+    # stats track every append made by sample(), so don't append directly
     speed_history: Deque[float] = field(default_factory=lambda: deque(maxlen=60))
     
+    # Throughput sampling
+    SAMPLE_INTERVAL = 0.25  # seconds per speed_history sample
+    CURRENT_SPEED_BUCKETS = 4  # samples averaged into current_speed
+    
     def __post_init__(self) -> None:
         """Initialize computed fields."""
-        self._last_update_time = time.time()
-        self._last_bytes = 0
+        self._bucket_start = time.time()
+        self._bucket_bytes = 0
+        
+        # Running statistics over speed_history (Welford, with eviction)
+        self._speed_mean = 0.0
+        self._speed_m2 = 0.0
+        self._efficiency = 0.0
+        for speed in list(self.speed_history):
+            self._speed_history_add(speed)
     
-    def update(self, bytes_downloaded: int, rtt_ms: float = 0.0) -> None:
+    def _speed_history_add(self, speed: float) -> None:
+        """Add a speed sample to the running mean and sum of squares."""
+        n = len(self.speed_history)
+        delta = speed - self._speed_mean
+        self._speed_mean += delta / n
+        self._speed_m2 += delta * (speed - self._speed_mean)
+    
+    def _speed_history_remove(self, speed: float) -> None:
+        """Remove an evicted speed sample from the running statistics."""
+        n = len(self.speed_history)
+        if n == 0:
+            self._speed_mean = 0.0
+            self._speed_m2 = 0.0
+            return
+        delta = speed - self._speed_mean
+        self._speed_mean -= delta / n
+        self._speed_m2 = max(0.0, self._speed_m2 - delta * (speed - self._speed_mean))
+    
+    def _record_speed(self, speed: float) -> None:
+        """Append a sample to speed_history, updating statistics in O(1)."""
+        maxlen = self.speed_history.maxlen
+        if maxlen is not None and len(self.speed_history) == maxlen:
+            self._speed_history_remove(self.speed_history.popleft())
+        self.speed_history.append(speed)
+        self._speed_history_add(speed)
+    
+    def record_bytes(self, num_bytes: int) -> None:
         """
-        Update metrics with new progress.
+        Count bytes received from the network as they stream in.
+        
+        Throughput is published per fixed SAMPLE_INTERVAL bucket, so many
+        connections finishing at once no longer produce spikes or zeros.
         
         Args:
-            bytes_downloaded: Total bytes downloaded so far
-            rtt_ms: Round-trip time in milliseconds
+            num_bytes: Bytes received since the last call
+        """
+        self.sample()
+        self._bucket_bytes += num_bytes
+    
+    def sample(self, now: Optional[float] = None) -> None:
         """
-        now = time.time()
-        time_delta = now - self._last_update_time
-        
-        if time_delta > 0:
-            bytes_delta = bytes_downloaded - self._last_bytes
-            self.current_speed = bytes_delta / time_delta
-            
-            # Update peak
-            if self.current_speed > self.peak_speed:
-                self.peak_speed = self.current_speed
-            
-            # Add to history
-            self.speed_history.append(self.current_speed)
+        Publish every throughput bucket that has fully elapsed.
         
-        self.bytes_downloaded = bytes_downloaded
-        self.rtt_ms = rtt_ms
+        Called on each record_bytes() and on a timer by the engine while a
+        transfer runs (multipart or single-stream), so stalls show up as
+        zero-throughput samples.
+        
+        Args:
+            now: Current time (defaults to time.time())
+        """
+        now = time.time() if now is None else now
+        elapsed_buckets = int((now - self._bucket_start) / self.SAMPLE_INTERVAL)
+        if elapsed_buckets <= 0:
+            return
+        
+        # A long gap only needs enough empty buckets to fill the history
+        maxlen = self.speed_history.maxlen or elapsed_buckets
+        for i in range(min(elapsed_buckets, maxlen)):
+            speed = self._bucket_bytes / self.SAMPLE_INTERVAL if i == 0 else 0.0
+            self._record_speed(speed)
+        
+        self._bucket_bytes = 0
+        self._bucket_start += elapsed_buckets * self.SAMPLE_INTERVAL
+        
+        # Current speed is smoothed over the last few buckets
+        recent = list(itertools.islice(reversed(self.speed_history), self.CURRENT_SPEED_BUCKETS))
+        self.current_speed = sum(recent) / len(recent)
+        
+        # Update peak
+        if self.current_speed > self.peak_speed:
+            self.peak_speed = self.current_speed
         
         # Calculate average speed
         elapsed = now - self.start_time
         if elapsed > 0:
             self.average_speed = self.bytes_downloaded / elapsed
         
-        self._last_update_time = now
-        self._last_bytes = bytes_downloaded
+        self._refresh_efficiency()
+    
+    def update(self, bytes_downloaded: int, rtt_ms: float = 0.0) -> None:
+        """
+        Update metrics with new progress.
+        
+        Speed is derived from record_bytes() samples, not from progress.
+        
+        Args:
+            bytes_downloaded: Total bytes downloaded so far
+            rtt_ms: Round-trip time in milliseconds
+        """
+        self.bytes_downloaded = bytes_downloaded
+        self.rtt_ms = rtt_ms
+        self.sample()
+        self._refresh_efficiency()
     
     def increment_errors(self) -> None:
         """Increment error count."""
         self.error_count += 1
+        self._refresh_efficiency()
     
     def increment_retries(self) -> None:
         """Increment retry count."""
@@ -102,28 +178,48 @@ class DownloadMetrics:
         """Get elapsed time in seconds."""
         return time.time() - self.start_time
     
+    @property
+    def speed_mean(self) -> float:
+        """Mean of speed_history in bytes/sec."""
+        return self._speed_mean if self.speed_history else 0.0
+    
+    @property
+    def speed_stdev(self) -> float:
+        """Sample standard deviation of speed_history in bytes/sec."""
+        n = len(self.speed_history)
+        if n < 2:
+            return 0.0
+        return math.sqrt(self._speed_m2 / (n - 1))
+    
+    @property
+    def speed_cv(self) -> float:
+        """Coefficient of variation of speed_history (0 if mean is 0)."""
+        mean = self.speed_mean
+        if mean == 0:
+            return 0.0
+        return self.speed_stdev / mean
+    
     @property
     def efficiency_score(self) -> float:
         """
-        Calculate efficiency score (0-100).
+        Efficiency score (0-100), cached on every update.
         Based on speed stability and error rate.
         """
+        return self._efficiency
+    
+    def _refresh_efficiency(self) -> None:
+        """Recompute the cached efficiency score from running statistics."""
         if not self.speed_history or self.average_speed == 0:
-            return 0.0
+            self._efficiency = 0.0
+            return
         
         # Speed stability (coefficient of variation)
-        speeds = list(self.speed_history)
-        if len(speeds) < 2:
+        if len(self.speed_history) < 2:
             stability = 1.0
+        elif self.speed_mean == 0:
+            stability = 0.0
         else:
-            import statistics
-            mean = statistics.mean(speeds)
-            if mean == 0:
-                stability = 0.0
-            else:
-                stdev = statistics.stdev(speeds)
-                cv = stdev / mean
-                stability = max(0, 1 - cv)  # Lower CV = higher stability
+            stability = max(0, 1 - self.speed_cv)  # Lower CV = higher stability
         
         # Error penalty
         total_operations = self.bytes_downloaded // (1024 * 1024) or 1  # Per MB
@@ -132,7 +228,7 @@ class DownloadMetrics:
         
         # Combined score
         score = (stability * 0.7 + error_penalty * 0.3) * 100
-        return min(100, max(0, score))
+        self._efficiency = min(100, max(0, score))
     
     def format_speed(self, speed: float) -> str:
         """Format speed in human-readable format."""
@@ -0,0 +1,199 @@
+"""
+Persistent cache of what earlier downloads learned about files and hosts.
+"""
+
+import json
+import os
+import tempfile
+import time
+from dataclasses import asdict, dataclass, field, fields
+from pathlib import Path
+from typing import Any, Dict, Optional, Type, TypeVar, Union, get_args
+from urllib.parse import urlparse
+
+# hosts.json under $XDG_CACHE_HOME/flux (~/.cache/flux by default)
+DEFAULT_CACHE_PATH = (
+    Path(os.environ.get("XDG_CACHE_HOME") or Path.home() / ".cache") / "flux" / "hosts.json"
+)
+
+
+@dataclass
+class CachedFile:
+    """Last known state of a remote file, revalidated with its ETag/Last-Modified."""
+    
+    size: int
+    supports_ranges: bool
+    filename: str
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+    final_url: Optional[str] = None
+    expires_at: Optional[float] = None
+    checked_at: float = field(default_factory=time.time)
+
+
+@dataclass
+class HostProfile:
+    """How an origin behaved in earlier downloads."""
+    
+    supports_ranges: Optional[bool] = None
+    ranges_checked_at: Optional[float] = None  # when supports_ranges was observed
+    throughput: Optional[float] = None  # smoothed bytes/sec of one connection
+    connections: Optional[int] = None  # connection count at peak speed
+    updated_at: float = field(default_factory=time.time)
+
+
+_Entry = TypeVar("_Entry", CachedFile, HostProfile)
+
+
+def _matches(value: object, annotation: Any) -> bool:
+    """Whether a JSON value fits a field annotated int, float, str, bool or Optional."""
+    types = get_args(annotation) or (annotation,)
+    if value is None:
+        return type(None) in types
+    if isinstance(value, bool):
+        return bool in types
+    if isinstance(value, int) and float in types:
+        return True  # Whole floats may be written as ints
+    return isinstance(value, types)
+
+
+def _load_entry(cls: Type[_Entry], entry: object) -> Optional[_Entry]:
+    """Build a cache entry from JSON, or None if it does not fit cls."""
+    if not isinstance(entry, dict):
+        return None
+    try:
+        loaded = cls(**entry)
+    except TypeError:
+        return None
+    for f in fields(cls):
+        if not _matches(getattr(loaded, f.name), f.type):
+            return None
+    return loaded
+
+
+class HostCache:
+    """
+    File info keyed by URL and host capabilities keyed by origin.
+    
+    Kept in memory and written to a JSON file as a whole; the file is
+    small, and a missing or unreadable one just means starting cold.
+    """
+    
+    VERSION = 1
+    MAX_FILES = 2000  # Least recently checked entries are dropped first
+    MAX_HOSTS = 500
+    
+    def __init__(self, path: Union[str, Path] = DEFAULT_CACHE_PATH) -> None:
+        """
+        Initialize an empty cache.
+        
+        Args:
+            path: JSON file to load from and save to
+        """
+        self.path = Path(path).expanduser()
+        self.files: Dict[str, CachedFile] = {}
+        self.hosts: Dict[str, HostProfile] = {}
+        self.dirty = False
+    
+    @staticmethod
+    def origin(url: str) -> str:
+        """Scheme and host of a URL, e.g. "https://example.com:8443"."""
+        parsed = urlparse(url)
+        return f"{parsed.scheme}://{parsed.netloc}"
+    
+    def load(self) -> None:
+        """
+        Read the cache file; unreadable files and entries are skipped.
+        
+        Entries whose fields have the wrong types are dropped too, so a
+        damaged or hand-edited file never breaks a download.
+        """
+        try:
+            data = json.loads(self.path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return
+        if not isinstance(data, dict) or data.get("version") != self.VERSION:
+            return
+        
+        files, hosts = data.get("files", {}), data.get("hosts", {})
+        if isinstance(files, dict):
+            for url, entry in files.items():
+                cached = _load_entry(CachedFile, entry)
+                if cached is not None:
+                    self.files[url] = cached
+        if isinstance(hosts, dict):
+            for origin, entry in hosts.items():
+                profile = _load_entry(HostProfile, entry)
+                if profile is not None:
+                    self.hosts[origin] = profile
+    
+    def snapshot(self) -> bytes:
+        """
+        Serialize the newest entries and mark the cache clean.
+        
+        Cheap enough to run on the event loop, so the entries cannot change
+        while they are written out by write() in another thread.
+        """
+        files = sorted(self.files.items(), key=lambda item: item[1].checked_at)
+        hosts = sorted(self.hosts.items(), key=lambda item: item[1].updated_at)
+        self.files = dict(files[-self.MAX_FILES :])
+        self.hosts = dict(hosts[-self.MAX_HOSTS :])
+        self.dirty = False
+        
+        data = {
+            "version": self.VERSION,
+            "files": {url: asdict(entry) for url, entry in self.files.items()},
+            "hosts": {origin: asdict(entry) for origin, entry in self.hosts.items()},
+        }
+        return json.dumps(data, separators=(",", ":")).encode("utf-8")
+    
+    def write(self, data: bytes) -> None:
+        """
+        Replace the cache file atomically with a snapshot.
+        
+        Each write goes through its own temporary file, so concurrent
+        writers (e.g. two Flux processes) never interleave their data.
+        
+        Raises:
+            OSError: If the file cannot be written
+        """
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        fd, temp_path = tempfile.mkstemp(
+            dir=self.path.parent, prefix=f"{self.path.name}.", suffix=".tmp"
+        )
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(temp_path, self.path)
+        except BaseException:
+            try:
+                os.unlink(temp_path)
+            except OSError:
+                pass
+            raise
+    
+    def get_file(self, url: str) -> Optional[CachedFile]:
+        """Cached info for url, if any."""
+        return self.files.get(url)
+    
+    def put_file(self, url: str, entry: CachedFile) -> None:
+        """Store (or refresh) the info for url."""
+        self.files[url] = entry
+        self.dirty = True
+    
+    def get_host(self, url: str) -> Optional[HostProfile]:
+        """Profile of the origin of url, if any."""
+        return self.hosts.get(self.origin(url))
+    
+    def update_host(self, url: str, **changes: object) -> None:
+        """
+        Set fields of the profile of url's origin, creating it if needed.
+        
+        None values are ignored, so callers can pass whatever they know.
+        """
+        profile = self.hosts.setdefault(self.origin(url), HostProfile())
+        for name, value in changes.items():
+            if value is not None:
+                setattr(profile, name, value)
+        profile.updated_at = time.time()
+        self.dirty = True
@@ -3,33 +3,136 @@ Adaptive HTTP client for downloading files.
 """
 
 import asyncio
+import re
 import ssl
 import time
-from typing import Optional, Tuple
-from urllib.parse import urlparse
+import weakref
+from collections import deque
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Any, AsyncIterator, Deque, Dict, Optional, Tuple
+from urllib.parse import parse_qsl, urlparse
 
 import aiohttp
 
+from flux.network.cache import CachedFile, HostCache
+
+
+@dataclass
+class FileInfo:
+    """What a probe learned about a remote file."""
+    
+    size: int
+    supports_ranges: bool
+    filename: str
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+    
+    # Where the redirect chain ended, and when that URL expires if signed
+    final_url: Optional[str] = None
+    expires_at: Optional[float] = None
+
+
+class RangeNotSupportedError(Exception):
+    """A server answered a range request with something other than that range."""
+
 
 class AdaptiveHTTPClient:
     """HTTP client with adaptive features."""
     
+    # Size of the buffers yielded by streaming reads
+    STREAM_BUFFER_SIZE = 256 * 1024  # 256KB
+    
+    # Range deadlines: expected transfer time at the observed per-connection
+    # throughput, multiplied by a slack factor, plus a fixed allowance
+    DEADLINE_SLACK = 4.0
+    DEADLINE_MIN_SECONDS = 30.0
+    THROUGHPUT_SMOOTHING = 0.3  # EWMA weight of the newest sample
+    MIN_THROUGHPUT_SAMPLE = 64 * 1024  # bytes needed for a usable sample
+    
+    # Slow-connection recycling: a connection whose transfers are slower than
+    # this percentile of its host's recent transfers RECYCLE_AFTER times in a
+    # row is closed, so the next request can land on a different backend
+    RECYCLE_PERCENTILE = 0.25
+    RECYCLE_AFTER = 3
+    RECYCLE_MIN_PEERS = 8
+    PEER_WINDOW = 50
+    
+    # Pinned redirect targets are dropped this long before a signed URL expires
+    PIN_EXPIRY_MARGIN = 30.0  # seconds
+    
+    # A host seen ignoring Range gets tested again after this long, so one
+    # stray 200 (e.g. a CDN edge miss) does not disable ranges for good
+    RANGE_RETEST_AFTER = 6 * 3600.0  # seconds
+    
     def __init__(
         self,
         timeout: int = 10,
         max_retries: int = 3,
+        read_timeout: float = 30.0,
+        recycle_slow_connections: bool = True,
+        cache: Optional[HostCache] = None,
     ) -> None:
         """
         Initialize client.
         
+        There is no fixed total timeout: a request only fails when connecting
+        takes too long, the socket stays idle for read_timeout, or a range
+        misses the deadline derived from its size and observed throughput.
+        
         Args:
-            timeout: Request timeout in seconds
+            timeout: Connect timeout in seconds
             max_retries: Maximum number of retries
+            read_timeout: Maximum idle time between reads in seconds
+            recycle_slow_connections: Close connections that are consistently
+                slower than their peers
+            cache: Persistent file and host info; probes of cached files are
+                revalidated with a conditional HEAD, and known hosts start
+                with their range support and throughput
         """
-        self.timeout = aiohttp.ClientTimeout(total=timeout)
+        self.timeout = aiohttp.ClientTimeout(
+            total=None,
+            connect=timeout,
+            sock_connect=timeout,
+            sock_read=read_timeout,
+        )
         self.max_retries = max_retries
         self._session: Optional[aiohttp.ClientSession] = None
         
+        # Smoothed per-connection throughput by host, in bytes/sec
+        self._throughput: Dict[str, float] = {}
+        
+        # Recent per-transfer rates by host and slow streaks by connection
+        self.recycle_slow_connections = recycle_slow_connections
+        self._peer_rates: Dict[str, Deque[float]] = {}
+        self._slow_streaks: "weakref.WeakKeyDictionary[Any, int]" = weakref.WeakKeyDictionary()
+        self.stats: Dict[str, int] = {
+            "connections_recycled": 0,
+            "urls_resolved": 0,
+            "ranges_ignored": 0,
+            "probes_revalidated": 0,
+        }
+        
+        # Whether each host honoured Range when last asked, and when; a host
+        # that ignored it is reported as range-incapable by probe()
+        self._range_support: Dict[str, Tuple[bool, float]] = {}
+        
+        self.cache = cache
+        if cache is not None:
+            for origin, profile in cache.hosts.items():
+                host = urlparse(origin).netloc
+                if profile.supports_ranges is not None:
+                    self._range_support[host] = (
+                        profile.supports_ranges,
+                        profile.ranges_checked_at or 0.0,
+                    )
+                if profile.throughput:
+                    self._throughput[host] = profile.throughput
+        
+        # Final redirect target (and expiry) by original URL; requests go
+        # straight there instead of repeating the redirect chain
+        self._resolved: Dict[str, Tuple[str, Optional[float]]] = {}
+        
         # Create SSL context that doesn't verify certificates
         # (for testing and to avoid SSL errors with some hosts)
         self.ssl_context = ssl.create_default_context()
@@ -77,12 +180,108 @@ class AdaptiveHTTPClient:
         Returns:
             Tuple of (file_size, supports_ranges, filename)
         
+        Raises:
+            aiohttp.ClientError: On HTTP errors
+        """
+        info = await self.probe(url)
+        return info.size, info.supports_ranges, info.filename
+    
+    async def probe(self, url: str) -> FileInfo:
+        """
+        Probe a URL with HEAD, falling back to a one-byte range GET.
+        
+        A file in the cache is only revalidated: a conditional HEAD sent
+        straight to its cached redirect target, answered with 304 Not
+        Modified if it is unchanged.
+        
+        Args:
+            url: File URL
+        
+        Returns:
+            FileInfo describing the remote file
+        
         Raises:
             aiohttp.ClientError: On HTTP errors
         """
         if not self._session:
             raise RuntimeError("Client not initialized. Use async with.")
         
+        cached = self.cache.get_file(url) if self.cache is not None else None
+        if cached is not None:
+            info = await self._revalidate(url, cached)
+            if info is not None:
+                return info
+        
+        info = await self._probe(url)
+        if self.cache is not None:
+            self.cache.put_file(
+                url,
+                CachedFile(
+                    size=info.size,
+                    supports_ranges=info.supports_ranges,
+                    filename=info.filename,
+                    etag=info.etag,
+                    last_modified=info.last_modified,
+                    final_url=info.final_url,
+                    expires_at=info.expires_at,
+                ),
+            )
+        return info
+    
+    async def _revalidate(self, url: str, cached: CachedFile) -> Optional[FileInfo]:
+        """
+        Confirm a cached file with a conditional HEAD.
+        
+        Returns:
+            FileInfo from the cache if the server answered 304, None if the
+            file changed, has no validators or the request failed
+        """
+        if cached.etag:
+            headers = {"If-None-Match": cached.etag}
+        elif cached.last_modified:
+            headers = {"If-Modified-Since": cached.last_modified}
+        else:
+            return None
+        
+        # Skip the redirect chain unless the cached target is about to expire
+        target = url
+        if cached.final_url and (
+            cached.expires_at is None
+            or cached.expires_at - time.time() >= self.PIN_EXPIRY_MARGIN
+        ):
+            target = cached.final_url
+        
+        head_timeout = aiohttp.ClientTimeout(total=5)
+        try:
+            async with self._session.head(
+                target, headers=headers, allow_redirects=True, timeout=head_timeout
+            ) as response:
+                if response.status != 304:
+                    return None
+                if target == url:
+                    final_url, expires_at = self._pin(url, response)
+                else:
+                    final_url, expires_at = target, cached.expires_at
+                    self._resolved[url] = (final_url, expires_at)
+        except (aiohttp.ClientError, asyncio.TimeoutError):
+            return None
+        
+        self.stats["probes_revalidated"] += 1
+        cached.final_url, cached.expires_at = final_url, expires_at
+        cached.checked_at = time.time()
+        self.cache.put_file(url, cached)
+        return FileInfo(
+            size=cached.size,
+            supports_ranges=cached.supports_ranges and self.range_support(url) is not False,
+            filename=cached.filename,
+            etag=cached.etag,
+            last_modified=cached.last_modified,
+            final_url=final_url,
+            expires_at=expires_at,
+        )
+    
+    async def _probe(self, url: str) -> FileInfo:
+        """Probe a URL without the cache (see probe)."""
         start_time = time.time()
         
         # Use a shorter timeout for HEAD requests (5 seconds)
@@ -99,13 +298,24 @@ class AdaptiveHTTPClient:
                 # Check range support
                 accept_ranges = response.headers.get("Accept-Ranges", "none")
                 supports_ranges = accept_ranges.lower() != "none"
+                if self.range_support(url) is False:
+                    supports_ranges = False  # Advertised, but ignored before
                 
                 # Extract filename from URL or Content-Disposition
                 filename = self._extract_filename(url, response.headers)
                 
                 rtt_ms = (time.time() - start_time) * 1000
                 
-                return file_size, supports_ranges, filename
+                final_url, expires_at = self._pin(url, response)
+                return FileInfo(
+                    size=file_size,
+                    supports_ranges=supports_ranges,
+                    filename=filename,
+                    etag=response.headers.get("ETag"),
+                    last_modified=response.headers.get("Last-Modified"),
+                    final_url=final_url,
+                    expires_at=expires_at,
+                )
                 
         except (aiohttp.ClientError, asyncio.TimeoutError):
             # If HEAD fails, try GET with Range header
@@ -126,29 +336,126 @@ class AdaptiveHTTPClient:
                         supports_ranges = False
                     
                     filename = self._extract_filename(url, response.headers)
-                    return file_size, supports_ranges, filename
+                    final_url, expires_at = self._pin(url, response)
+                    return FileInfo(
+                        size=file_size,
+                        supports_ranges=supports_ranges,
+                        filename=filename,
+                        etag=response.headers.get("ETag"),
+                        last_modified=response.headers.get("Last-Modified"),
+                        final_url=final_url,
+                        expires_at=expires_at,
+                    )
                     
             except Exception:
                 raise
     
-    async def download_chunk(
+    async def open_range(
+        self, url: str, start: int, end: int
+    ) -> Tuple[FileInfo, aiohttp.ClientResponse]:
+        """
+        Send a range GET whose response also serves as the probe.
+        
+        A 206 reveals range support and, through Content-Range, the file
+        size; a 200 means the server ignored the range and the body is the
+        whole file. The caller reads the body from the returned response and
+        must release() it.
+        
+        Args:
+            url: File URL
+            start: Start byte position
+            end: End byte position (inclusive)
+        
+        Returns:
+            Tuple of (FileInfo, response with the body still unread)
+        
+        Raises:
+            aiohttp.ClientError: On HTTP errors after retries
+        """
+        if not self._session:
+            raise RuntimeError("Client not initialized. Use async with.")
+        
+        retry_count = 0
+        while True:
+            target = self.resolved_url(url)
+            try:
+                response = await self._session.get(
+                    target,
+                    headers={"Range": f"bytes={start}-{end}"},
+                    timeout=self.range_timeout(url, end - start + 1),
+                )
+            except (aiohttp.ClientError, asyncio.TimeoutError):
+                if retry_count >= self.max_retries:
+                    raise
+                # Exponential backoff with jitter
+                wait_time = (2 ** retry_count) + (time.time() % 1)
+                retry_count += 1
+                await asyncio.sleep(wait_time)
+                continue
+            
+            if target != url and self._pin_rejected(response.status):
+                # Pinned URL expired or was revoked: resolve it again
+                response.release()
+                self._resolved.pop(url, None)
+                continue
+            break
+        
+        try:
+            response.raise_for_status()
+            
+            if response.status == 206:
+                self._check_range(url, target, response, start, end)
+                # The total may be "*" if unknown
+                total = self._parse_content_range(response.headers.get("Content-Range"))[2]
+                file_size = total or 0
+                supports_ranges = True
+            else:
+                content_length = response.headers.get("Content-Length")
+                file_size = int(content_length) if content_length else 0
+                supports_ranges = False
+                self._observe_ranges(target, False)
+            
+            final_url, expires_at = self._pin(url, response)
+            info = FileInfo(
+                size=file_size,
+                supports_ranges=supports_ranges,
+                filename=self._extract_filename(url, response.headers),
+                etag=response.headers.get("ETag"),
+                last_modified=response.headers.get("Last-Modified"),
+                final_url=final_url,
+                expires_at=expires_at,
+            )
+        except BaseException:
+            response.release()
+            raise
+        
+        return info, response
+    
+    async def stream_chunk(
         self,
         url: str,
         start: int,
         end: int,
-        retry_count: int = 0,
-    ) -> Tuple[bytes, float]:
+        buffer_size: Optional[int] = None,
+    ) -> AsyncIterator[bytes]:
         """
-        Download a chunk of the file.
+        Stream a chunk of the file in fixed-size buffers.
+        
+        Interrupted transfers are retried from the first byte not yet
+        yielded, so the bytes of the n-th buffer always start at ``start``
+        plus the length of everything yielded before it.
+        
+        Requests go to the pinned redirect target of url when there is one;
+        if it answers with a 4xx, the redirect chain is followed again.
         
         Args:
             url: File URL
             start: Start byte position
             end: End byte position (inclusive)
-            retry_count: Current retry attempt
+            buffer_size: Maximum buffer size (defaults to STREAM_BUFFER_SIZE)
         
-        Returns:
-            Tuple of (chunk_data, rtt_ms)
+        Yields:
+            Consecutive buffers of chunk data
         
         Raises:
             aiohttp.ClientError: On HTTP errors after retries
@@ -156,51 +463,329 @@ class AdaptiveHTTPClient:
         if not self._session:
             raise RuntimeError("Client not initialized. Use async with.")
         
-        headers = {"Range": f"bytes={start}-{end}"}
+        buffer_size = buffer_size or self.STREAM_BUFFER_SIZE
+        received = 0
+        retry_count = 0
         
-        try:
-            start_time = time.time()
+        while True:
+            headers = {"Range": f"bytes={start + received}-{end}"}
+            timeout = self.range_timeout(url, end - (start + received) + 1)
+            target = self.resolved_url(url)
             
-            async with self._session.get(url, headers=headers) as response:
-                # Accept 206 (Partial Content) or 200 (full content)
-                if response.status not in (200, 206):
-                    response.raise_for_status()
-                
-                data = await response.read()
-                rtt_ms = (time.time() - start_time) * 1000
-                
-                return data, rtt_ms
-        
-        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
-            if retry_count < self.max_retries:
+            try:
+                async with self._session.get(target, headers=headers, timeout=timeout) as response:
+                    if target != url and self._pin_rejected(response.status):
+                        # Pinned URL expired or was revoked: resolve it again
+                        self._resolved.pop(url, None)
+                        continue
+                    
+                    if response.status not in (200, 206):
+                        response.raise_for_status()
+                    self._check_range(url, target, response, start + received, end)
+                    self._pin(url, response)
+                    
+                    # The connection goes back to the pool once the body is read
+                    protocol = response.connection.protocol if response.connection else None
+                    
+                    first_byte_time = 0.0
+                    streamed = 0
+                    async for data in response.content.iter_chunked(buffer_size):
+                        if not streamed:
+                            first_byte_time = time.time()
+                        streamed += len(data)
+                        received += len(data)
+                        yield data
+                    
+                    if streamed:
+                        seconds = time.time() - first_byte_time
+                        self._record_throughput(url, streamed, seconds)
+                        self._check_connection(url, protocol, streamed, seconds)
+                    
+                    # A body cut short without an error still needs its tail
+                    if start + received <= end:
+                        raise aiohttp.ClientPayloadError(
+                            f"Response ended at byte {start + received} of {end}"
+                        )
+                    return
+            
+            except (aiohttp.ClientError, asyncio.TimeoutError):
+                if retry_count >= self.max_retries:
+                    raise
                 # Exponential backoff with jitter
                 wait_time = (2 ** retry_count) + (time.time() % 1)
+                retry_count += 1
                 await asyncio.sleep(wait_time)
-                return await self.download_chunk(url, start, end, retry_count + 1)
-            else:
-                raise
     
-    async def download_full(self, url: str) -> Tuple[bytes, float]:
+    def remember_host(self, url: str, connections: Optional[int] = None) -> None:
+        """
+        Store what is known about the host of url in the cache, if any.
+        
+        Args:
+            url: URL on the host
+            connections: Connection count that gave the best throughput
+        """
+        if self.cache is None:
+            return
+        host = urlparse(url).netloc
+        supports_ranges, checked_at = self._range_support.get(host, (None, None))
+        self.cache.update_host(
+            url,
+            supports_ranges=supports_ranges,
+            ranges_checked_at=checked_at,
+            throughput=self._throughput.get(host),
+            connections=connections,
+        )
+    
+    def range_support(self, url: str) -> Optional[bool]:
+        """
+        Whether the host of url honoured ranges when last asked.
+        
+        Returns:
+            None if unknown, or if the host ignored Range more than
+            RANGE_RETEST_AFTER ago and should be tried again
+        """
+        supported, checked_at = self._range_support.get(urlparse(url).netloc, (None, 0.0))
+        if supported is False and time.time() - checked_at > self.RANGE_RETEST_AFTER:
+            return None
+        return supported
+    
+    def _observe_ranges(self, url: str, supported: bool) -> None:
+        """Record whether the host of url just honoured a range request."""
+        self._range_support[urlparse(url).netloc] = (supported, time.time())
+    
+    @staticmethod
+    def _parse_content_range(
+        value: Optional[str],
+    ) -> Tuple[Optional[int], Optional[int], Optional[int]]:
+        """Split "bytes first-last/total" into integers (None where absent or "*")."""
+        match = re.fullmatch(r"\s*bytes\s+(?:(\d+)-(\d+)|\*)\s*/\s*(\d+|\*)\s*", value or "")
+        if not match:
+            return None, None, None
+        first, last, total = match.groups()
+        return (
+            int(first) if first else None,
+            int(last) if last else None,
+            int(total) if total != "*" else None,
+        )
+    
+    def _check_range(
+        self, url: str, target: str, response: aiohttp.ClientResponse, start: int, end: int
+    ) -> None:
+        """
+        Make sure a response carries the requested range and nothing else.
+        
+        A 200 (unless it is exactly the requested bytes), or a 206 whose
+        Content-Range starts elsewhere or runs past end, means the server
+        ignores Range. The connection is closed before the body is read and
+        the host is remembered as range-incapable.
+        
+        Raises:
+            RangeNotSupportedError: If the response is not the requested range
+        """
+        if response.status == 206:
+            first, last, _ = self._parse_content_range(response.headers.get("Content-Range"))
+            if first == start and last is not None and last <= end:
+                self._observe_ranges(target, True)
+                return
+        elif start == 0 and response.content_length == end + 1:
+            return  # The whole file is exactly the requested range
+        
+        response.close()
+        for ignoring in (url, target):
+            self._observe_ranges(ignoring, False)
+        self.stats["ranges_ignored"] += 1
+        raise RangeNotSupportedError(
+            f"{urlparse(target).netloc} ignored Range bytes={start}-{end} "
+            f"(HTTP {response.status}, Content-Range: "
+            f"{response.headers.get('Content-Range', 'none')})"
+        )
+    
+    def resolved_url(self, url: str) -> str:
+        """
+        URL to request for url: its pinned redirect target, or url itself.
+        
+        A pin whose signed URL expires within PIN_EXPIRY_MARGIN is dropped,
+        so the next request follows the redirect chain for a fresh one.
+        """
+        pinned = self._resolved.get(url)
+        if pinned is None:
+            return url
+        
+        final_url, expires_at = pinned
+        if expires_at is not None and expires_at - time.time() < self.PIN_EXPIRY_MARGIN:
+            del self._resolved[url]
+            return url
+        return final_url
+    
+    def resolution(self, url: str) -> Tuple[str, Optional[float]]:
+        """Pinned (final_url, expires_at) for url, or (url, None) if not redirected."""
+        return self._resolved.get(url, (url, None))
+    
+    def _pin(self, url: str, response: aiohttp.ClientResponse) -> Tuple[str, Optional[float]]:
+        """
+        Remember where a response for url ended up after redirects.
+        
+        Returns:
+            (final_url, expires_at) of the response
+        """
+        final_url = str(response.url)
+        expires_at = self.url_expiry(final_url)
+        if response.history and final_url != url:
+            self._resolved[url] = (final_url, expires_at)
+            self.stats["urls_resolved"] += 1
+        return final_url, expires_at
+    
+    @staticmethod
+    def _pin_rejected(status: int) -> bool:
+        """Whether a status from a pinned URL means it should be resolved again."""
+        return 400 <= status < 500 and status != 416
+    
+    @staticmethod
+    def url_expiry(url: str) -> Optional[float]:
+        """
+        Expiry time of a signed URL, from its query parameters.
+        
+        Understands AWS SigV4 (X-Amz-Date/X-Amz-Expires), Google
+        (X-Goog-Date/X-Goog-Expires), Azure SAS (se) and the Expires epoch
+        used by CloudFront and S3 SigV2.
+        
+        Args:
+            url: URL to inspect
+        
+        Returns:
+            Unix timestamp, or None if the URL is not recognizably signed
+        """
+        params = {k.lower(): v for k, v in parse_qsl(urlparse(url).query)}
+        try:
+            for prefix in ("x-amz-", "x-goog-"):
+                if f"{prefix}date" in params and f"{prefix}expires" in params:
+                    signed = datetime.strptime(params[f"{prefix}date"], "%Y%m%dT%H%M%SZ")
+                    signed = signed.replace(tzinfo=timezone.utc)
+                    return signed.timestamp() + int(params[f"{prefix}expires"])
+            
+            if "se" in params and "sig" in params:
+                expiry = datetime.fromisoformat(params["se"].replace("Z", "+00:00"))
+                if expiry.tzinfo is None:
+                    expiry = expiry.replace(tzinfo=timezone.utc)
+                return expiry.timestamp()
+            
+            if "expires" in params:
+                return float(params["expires"])
+        except ValueError:
+            pass
+        return None
+    
+    def range_timeout(self, url: str, num_bytes: int) -> aiohttp.ClientTimeout:
         """
-        Download entire file (for servers that don't support ranges).
+        Timeout for fetching num_bytes from url over one connection.
+        
+        Connect and idle-read limits always apply. A total deadline is only
+        set once throughput to the host has been observed, and is generous
+        enough that slow but healthy transfers are never cut off.
         
         Args:
             url: File URL
+            num_bytes: Size of the requested range
         
         Returns:
-            Tuple of (file_data, rtt_ms)
+            Timeout for the request
+        """
+        throughput = self._throughput.get(urlparse(url).netloc)
+        if not throughput:
+            return self.timeout
+        
+        expected = num_bytes / throughput
+        deadline = (self.timeout.connect or 0) + self.DEADLINE_MIN_SECONDS
+        deadline += expected * self.DEADLINE_SLACK
+        
+        return aiohttp.ClientTimeout(
+            total=deadline,
+            connect=self.timeout.connect,
+            sock_connect=self.timeout.sock_connect,
+            sock_read=self.timeout.sock_read,
+        )
+    
+    def _record_throughput(self, url: str, num_bytes: int, seconds: float) -> None:
+        """Fold one transfer into the smoothed per-connection throughput."""
+        if num_bytes < self.MIN_THROUGHPUT_SAMPLE or seconds <= 0:
+            return
+        
+        host = urlparse(url).netloc
+        sample = num_bytes / seconds
+        previous = self._throughput.get(host)
+        if previous is None:
+            self._throughput[host] = sample
+        else:
+            alpha = self.THROUGHPUT_SMOOTHING
+            self._throughput[host] = alpha * sample + (1 - alpha) * previous
+    
+    def connection_throughput(self, url: str) -> Optional[float]:
+        """Smoothed per-connection throughput to the host of url (bytes/sec)."""
+        return self._throughput.get(urlparse(url).netloc)
+    
+    def _check_connection(
+        self, url: str, protocol: Any, num_bytes: int, seconds: float
+    ) -> None:
+        """Close a connection that keeps lagging behind its peers."""
+        if not self.recycle_slow_connections or protocol is None:
+            return
+        if num_bytes < self.MIN_THROUGHPUT_SAMPLE or seconds <= 0:
+            return
+        
+        rate = num_bytes / seconds
+        peers = self._peer_rates.setdefault(urlparse(url).netloc, deque(maxlen=self.PEER_WINDOW))
+        
+        if len(peers) >= self.RECYCLE_MIN_PEERS:
+            ordered = sorted(peers)
+            threshold = ordered[int(len(ordered) * self.RECYCLE_PERCENTILE)]
+            if rate < threshold:
+                self._slow_streaks[protocol] = self._slow_streaks.get(protocol, 0) + 1
+            else:
+                self._slow_streaks.pop(protocol, None)
+            
+            if self._slow_streaks.get(protocol, 0) >= self.RECYCLE_AFTER:
+                # Dropped from the pool; the next request opens a fresh one
+                self._slow_streaks.pop(protocol, None)
+                protocol.close()
+                self.stats["connections_recycled"] += 1
+        
+        peers.append(rate)
+    
+    async def stream_full(
+        self, url: str, buffer_size: Optional[int] = None
+    ) -> AsyncIterator[bytes]:
+        """
+        Stream the entire file in fixed-size buffers.
+        
+        Used for servers that don't support ranges; the transfer cannot be
+        resumed, so errors are raised to the caller instead of retried.
+        
+        Args:
+            url: File URL
+            buffer_size: Maximum buffer size (defaults to STREAM_BUFFER_SIZE)
+        
+        Yields:
+            Consecutive buffers of file data
         """
         if not self._session:
             raise RuntimeError("Client not initialized. Use async with.")
         
-        start_time = time.time()
+        buffer_size = buffer_size or self.STREAM_BUFFER_SIZE
         
-        async with self._session.get(url) as response:
-            response.raise_for_status()
-            data = await response.read()
-            rtt_ms = (time.time() - start_time) * 1000
+        target = self.resolved_url(url)
+        async with self._session.get(target) as response:
+            if target != url and self._pin_rejected(response.status):
+                # Re-resolve before any data was yielded
+                self._resolved.pop(url, None)
+                response.release()
+                async for data in self.stream_full(url, buffer_size):
+                    yield data
+                return
             
-            return data, rtt_ms
+            response.raise_for_status()
+            self._pin(url, response)
+            async for data in response.content.iter_chunked(buffer_size):
+                yield data
     
     def _extract_filename(self, url: str, headers: dict) -> str:
         """
@@ -234,6 +819,26 @@ class AdaptiveHTTPClient:
         # Last resort
         return "download"
     
+    def filename_from_url(self, url: str) -> str:
+        """Filename implied by a URL alone, before any response is seen."""
+        return self._extract_filename(url, {})
+    
+    @staticmethod
+    def is_retryable_error(exception: Exception) -> bool:
+        """
+        Classify if a failed transfer is worth retrying.
+        
+        Any HTTP or transport failure may succeed on another attempt;
+        local errors (e.g. a full disk) will not.
+        
+        Args:
+            exception: Exception to classify
+        
+        Returns:
+            True if the request can be retried
+        """
+        return isinstance(exception, (aiohttp.ClientError, asyncio.TimeoutError))
+    
     @staticmethod
     def is_network_error(exception: Exception) -> bool:
         """
@@ -0,0 +1,57 @@
+"""
+Hash algorithms for verifying downloaded data.
+"""
+
+import hashlib
+from typing import Any
+
+
+class _Crc32cHash:
+    """hashlib-style wrapper around the optional crc32c package."""
+    
+    def __init__(self, crc32c_module: Any) -> None:
+        """
+        Initialize the running checksum.
+        
+        Args:
+            crc32c_module: The imported crc32c module
+        """
+        self._crc32c = crc32c_module.crc32c
+        self._value = 0
+    
+    def update(self, data: bytes) -> None:
+        """Add data to the checksum."""
+        self._value = self._crc32c(data, self._value)
+    
+    def hexdigest(self) -> str:
+        """Checksum as 8 hex digits."""
+        return f"{self._value:08x}"
+
+
+def new_hasher(algorithm: str) -> Any:
+    """
+    Create a hasher with hashlib's update()/hexdigest() interface.
+    
+    Args:
+        algorithm: "crc32c" or any hashlib algorithm name, e.g. "sha256"
+    
+    Returns:
+        A fresh hasher
+    
+    Raises:
+        ValueError: If the algorithm is unknown or its package is missing
+    """
+    if algorithm == "crc32c":
+        try:
+            import crc32c
+        except ImportError:
+            raise ValueError(
+                "crc32c hashing requires the crc32c package "
+                "(pip install flux-download[crc32c])"
+            ) from None
+        return _Crc32cHash(crc32c)
+    
+    try:
+        return hashlib.new(algorithm)
+    except ValueError:
+        raise ValueError(f"Unsupported hash algorithm: {algorithm}") from None
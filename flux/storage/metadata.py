@@ -0,0 +1,139 @@
+"""
+Binary resume metadata (``.flux.meta``) with JSON migration.
+
+Layout (little-endian)::
+    
+    magic "FLXM" | version u16 | reserved u16 | total_size u64 | range_count u32
+    etag_len u16 | etag utf-8 | last_modified_len u16 | last_modified utf-8
+    range_count x (start u64, end u64)
+    crc32 u32 of everything above
+"""
+
+import json
+import struct
+import sys
+import zlib
+from array import array
+from dataclasses import dataclass, field
+from itertools import chain
+from typing import List, Optional, Tuple
+
+MAGIC = b"FLXM"
+VERSION = 1
+
+_HEADER = struct.Struct("<4sHHQI")
+_LENGTH = struct.Struct("<H")
+_CRC = struct.Struct("<I")
+
+
+@dataclass
+class ResumeMetadata:
+    """Completed ranges of a partial file and the validators of its source."""
+    
+    total_size: int
+    ranges: List[Tuple[int, int]] = field(default_factory=list)
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+    
+    def matches_source(self, etag: Optional[str], last_modified: Optional[str]) -> bool:
+        """
+        Whether the partial data still belongs to the file on the server.
+        
+        ETags are compared when both sides have one, otherwise Last-Modified;
+        without validators on both sides the data is trusted.
+        """
+        if self.etag and etag:
+            return self.etag == etag
+        if self.last_modified and last_modified:
+            return self.last_modified == last_modified
+        return True
+
+
+def _pack_str(value: Optional[str]) -> bytes:
+    """Length-prefixed UTF-8 string (empty for None)."""
+    data = (value or "").encode("utf-8")[:0xFFFF]
+    return _LENGTH.pack(len(data)) + data
+
+
+def encode(metadata: ResumeMetadata) -> bytes:
+    """
+    Serialize metadata to the binary format.
+    
+    The ranges are packed as one machine array, so a checkpoint costs a
+    single copy regardless of how fragmented the file is.
+    """
+    bounds = array("Q", chain.from_iterable(metadata.ranges))
+    if sys.byteorder == "big":
+        bounds.byteswap()
+    
+    body = b"".join(
+        (
+            _HEADER.pack(MAGIC, VERSION, 0, metadata.total_size, len(bounds) // 2),
+            _pack_str(metadata.etag),
+            _pack_str(metadata.last_modified),
+            bounds.tobytes(),
+        )
+    )
+    return body + _CRC.pack(zlib.crc32(body))
+
+
+def _decode_binary(data: bytes) -> ResumeMetadata:
+    """Parse the binary format, checking version, lengths and checksum."""
+    if len(data) < _HEADER.size + _CRC.size:
+        raise ValueError("Metadata truncated")
+    
+    body, (crc,) = data[: -_CRC.size], _CRC.unpack(data[-_CRC.size :])
+    if zlib.crc32(body) != crc:
+        raise ValueError("Metadata checksum mismatch")
+    
+    _, version, _, total_size, range_count = _HEADER.unpack_from(body)
+    if version != VERSION:
+        raise ValueError(f"Unsupported metadata version {version}")
+    
+    offset = _HEADER.size
+    strings = []
+    for _ in range(2):
+        (length,) = _LENGTH.unpack_from(body, offset)
+        offset += _LENGTH.size
+        strings.append(body[offset : offset + length].decode("utf-8") or None)
+        offset += length
+    
+    bounds = array("Q")
+    bounds.frombytes(body[offset:])
+    if len(bounds) != range_count * 2:
+        raise ValueError("Metadata range count mismatch")
+    if sys.byteorder == "big":
+        bounds.byteswap()
+    
+    return ResumeMetadata(
+        total_size=total_size,
+        ranges=list(zip(bounds[::2], bounds[1::2])),
+        etag=strings[0],
+        last_modified=strings[1],
+    )
+
+
+def _decode_json(data: bytes) -> ResumeMetadata:
+    """Parse the older JSON formats ("ranges" list or per-chunk "chunks" dict)."""
+    metadata = json.loads(data.decode("utf-8"))
+    
+    if "ranges" in metadata:
+        ranges = [(start, end) for start, end in metadata["ranges"]]
+    else:
+        # Legacy format: {offset: size} per completed chunk
+        chunks_data = metadata.get("chunks", {})
+        ranges = [(int(k), int(k) + v) for k, v in chunks_data.items()]
+    
+    return ResumeMetadata(total_size=metadata.get("total_size"), ranges=ranges)
+
+
+def decode(data: bytes) -> ResumeMetadata:
+    """
+    Parse metadata in the binary format or any older JSON format.
+    
+    Raises:
+        ValueError: If the data is corrupt or in an unknown format
+    """
+    if data.startswith(MAGIC):
+        return _decode_binary(data)
+    return _decode_json(data)
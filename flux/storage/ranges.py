@@ -0,0 +1,132 @@
+"""
+Compact interval set for tracking completed byte ranges.
+"""
+
+from bisect import bisect_left, bisect_right
+from typing import Iterable, Iterator, List, Optional, Tuple
+
+
+class RangeSet:
+    """
+    Sorted set of merged, half-open byte ranges ``[start, end)``.
+    
+    Adjacent and overlapping ranges are merged on insert, so the set stays
+    as small as the number of holes in the file. Lookups use binary search.
+    """
+    
+    def __init__(self, ranges: Iterable[Tuple[int, int]] = ()) -> None:
+        """
+        Initialize range set.
+        
+        Args:
+            ranges: Optional initial (start, end) pairs, end exclusive
+        """
+        self._starts: List[int] = []
+        self._ends: List[int] = []
+        self._total = 0
+        
+        for start, end in ranges:
+            self.add(start, end)
+    
+    def add(self, start: int, end: int) -> None:
+        """
+        Mark [start, end) as covered.
+        
+        Args:
+            start: First byte of the range
+            end: One past the last byte of the range
+        """
+        if start >= end:
+            return
+        
+        # Intervals i..j-1 overlap or touch the new range
+        i = bisect_left(self._ends, start)
+        j = bisect_right(self._starts, end)
+        
+        removed = 0
+        if i < j:
+            for k in range(i, j):
+                removed += self._ends[k] - self._starts[k]
+            start = min(start, self._starts[i])
+            end = max(end, self._ends[j - 1])
+        
+        self._starts[i:j] = [start]
+        self._ends[i:j] = [end]
+        self._total += (end - start) - removed
+    
+    def remove(self, start: int, end: int) -> None:
+        """
+        Mark [start, end) as not covered, splitting ranges as needed.
+        
+        Args:
+            start: First byte of the range
+            end: One past the last byte of the range
+        """
+        if start >= end:
+            return
+        
+        # Intervals i..j-1 overlap the removed range (touching is not enough)
+        i = bisect_right(self._ends, start)
+        j = bisect_left(self._starts, end)
+        if i >= j:
+            return
+        
+        kept_starts: List[int] = []
+        kept_ends: List[int] = []
+        removed = 0
+        for k in range(i, j):
+            removed += self._ends[k] - self._starts[k]
+        if self._starts[i] < start:
+            kept_starts.append(self._starts[i])
+            kept_ends.append(start)
+            removed -= start - self._starts[i]
+        if self._ends[j - 1] > end:
+            kept_starts.append(end)
+            kept_ends.append(self._ends[j - 1])
+            removed -= self._ends[j - 1] - end
+        
+        self._starts[i:j] = kept_starts
+        self._ends[i:j] = kept_ends
+        self._total -= removed
+    
+    def contains(self, start: int, end: int) -> bool:
+        """Check whether [start, end) is fully covered."""
+        if start >= end:
+            return True
+        i = bisect_right(self._starts, start) - 1
+        return i >= 0 and self._ends[i] >= end
+    
+    def next_missing(self, offset: int, limit: int) -> Optional[Tuple[int, int]]:
+        """
+        Find the first uncovered range at or after offset.
+        
+        Args:
+            offset: Position to search from
+            limit: Upper bound (exclusive), usually the file size
+        
+        Returns:
+            (start, end) of the gap clipped to limit, or None if covered
+        """
+        i = bisect_right(self._starts, offset) - 1
+        if i >= 0 and self._ends[i] > offset:
+            offset = self._ends[i]
+        i += 1
+        
+        if offset >= limit:
+            return None
+        
+        gap_end = self._starts[i] if i < len(self._starts) else limit
+        return offset, min(gap_end, limit)
+    
+    @property
+    def total(self) -> int:
+        """Total number of covered bytes."""
+        return self._total
+    
+    def __iter__(self) -> Iterator[Tuple[int, int]]:
+        """Iterate over merged (start, end) pairs in order."""
+        return iter(zip(self._starts, self._ends))
+    
+    def __len__(self) -> int:
+        """Number of merged ranges."""
+        return len(self._starts)
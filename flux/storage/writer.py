@@ -3,74 +3,109 @@ Async file writer with resume support.
 """
 
 import asyncio
-import json
 import os
 from pathlib import Path
-from typing import Dict, Optional
+from typing import Any, Optional
 
 import aiofiles
 
+from flux.storage import metadata as resume_metadata
+from flux.storage.hashing import new_hasher
+from flux.storage.metadata import ResumeMetadata
+from flux.storage.ranges import RangeSet
+
 
 class AsyncFileWriter:
     """
     Handles concurrent chunk writes with resume capability.
     """
     
-    def __init__(self, filepath: str, total_size: int) -> None:
+    # Bytes read per step when hashing written data
+    HASH_BLOCK_SIZE = 1024 * 1024  # 1MB
+    
+    # Incremental hashing: largest span hashed per worker-thread call, so
+    # close() never waits long for a running step
+    HASH_STEP = 64 * 1024 * 1024  # 64MB
+    
+    def __init__(
+        self,
+        filepath: str,
+        total_size: int,
+        hash_algorithm: Optional[str] = None,
+        etag: Optional[str] = None,
+        last_modified: Optional[str] = None,
+    ) -> None:
         """
         Initialize file writer.
         
         Args:
             filepath: Destination file path
             total_size: Total file size in bytes
+            hash_algorithm: Optionally compute this digest ("sha256", "md5",
+                "crc32c", ...) while downloading; see finish_hash()
+            etag: Source ETag, stored with resume metadata; partial data
+                saved for a different ETag is discarded
+            last_modified: Source Last-Modified, used like etag when the
+                server sends no ETag
         """
         self.filepath = Path(filepath)
         self.total_size = total_size
+        self.etag = etag
+        self.last_modified = last_modified
         self.partial_path = Path(f"{filepath}.flux.partial")
         self.metadata_path = Path(f"{filepath}.flux.meta")
         self._lock = asyncio.Lock()
-        self._file_handle: Optional[asyncio.streams.StreamWriter] = None
+        self._metadata_lock = asyncio.Lock()
+        self._pending_metadata: Optional[asyncio.Future] = None
+        self._fd: Optional[int] = None
+        
+        # Byte ranges written so far; the single source of truth for resume
+        self.completed = RangeSet()
+        
+        # Digest of the contiguous completed prefix, advanced in the background
+        self.hash_algorithm = hash_algorithm
+        self.digest: Optional[str] = None
+        self._hasher: Any = new_hasher(hash_algorithm) if hash_algorithm else None
+        self._hashed_offset = 0
+        self._hashing_end = 0  # End of the span hashed or being hashed
+        self._hash_task: Optional[asyncio.Task] = None
+        self._hash_stopping = False
     
-    async def initialize(self) -> tuple[int, Dict[int, int]]:
+    async def initialize(self) -> tuple[int, RangeSet]:
         """
         Initialize file for writing. Resume if partial file exists.
         
         Returns:
-            Tuple of (bytes_downloaded, completed_chunks_map)
+            Tuple of (bytes_downloaded, completed_ranges)
         """
         # Check for existing partial download
-        bytes_downloaded = 0
-        completed_chunks = {}
+        self.completed = RangeSet()
         
         if self.partial_path.exists() and self.metadata_path.exists():
             # Resume mode
             try:
-                async with aiofiles.open(self.metadata_path, "r") as f:
-                    metadata_str = await f.read()
-                    metadata = json.loads(metadata_str)
-                    bytes_downloaded = metadata.get("bytes_downloaded", 0)
-                    
-                    # Restore completed chunks map
-                    chunks_data = metadata.get("chunks", {})
-                    completed_chunks = {int(k): v for k, v in chunks_data.items()}
+                async with aiofiles.open(self.metadata_path, "rb") as f:
+                    # Binary, or JSON from older versions (rewritten as binary
+                    # on the next checkpoint)
+                    metadata = resume_metadata.decode(await f.read())
                     
-                    # Verify total size matches
-                    if metadata.get("total_size") != self.total_size:
-                        # File size mismatch, start fresh
-                        bytes_downloaded = 0
-                        completed_chunks = {}
+                    # Verify the partial data belongs to the same file
+                    if metadata.total_size != self.total_size or not (
+                        metadata.matches_source(self.etag, self.last_modified)
+                    ):
+                        # File changed on the server, start fresh
                         await self._create_fresh()
-                    # else: valid resume
+                    else:
+                        self.completed = RangeSet(metadata.ranges)
             except Exception:
                 # Metadata corrupted, start fresh
-                bytes_downloaded = 0
-                completed_chunks = {}
+                self.completed = RangeSet()
                 await self._create_fresh()
         else:
             # Fresh download
             await self._create_fresh()
         
-        return bytes_downloaded, completed_chunks
+        return self.completed.total, self.completed
     
     async def _create_fresh(self) -> None:
         """Create a fresh partial file."""
@@ -89,40 +124,268 @@ class AsyncFileWriter:
                 await f.seek(self.total_size - 1)
                 await f.write(b"\0")
     
+    def _open(self) -> int:
+        """Open the partial file once and keep the descriptor for the download."""
+        if self._fd is None:
+            flags = os.O_RDWR | getattr(os, "O_BINARY", 0)
+            self._fd = os.open(self.partial_path, flags)
+        return self._fd
+    
+    def _write_at(self, fd: int, offset: int, data: bytes) -> None:
+        """Write all of data at offset (blocking, runs in a worker thread)."""
+        view = memoryview(data)
+        while view:
+            written = os.pwrite(fd, view, offset)
+            view = view[written:]
+            offset += written
+    
+    def _seek_write(self, fd: int, offset: int, data: bytes) -> None:
+        """Fallback for platforms without os.pwrite (e.g. Windows)."""
+        os.lseek(fd, offset, os.SEEK_SET)
+        view = memoryview(data)
+        while view:
+            view = view[os.write(fd, view):]
+    
     async def write_chunk(self, offset: int, data: bytes) -> None:
         """
         Write a chunk at the specified offset.
         
+        Positional writes do not share a file position, so concurrent
+        writers run in parallel without locking.
+        
         Args:
             offset: Byte offset to write at
             data: Chunk data
         """
-        async with self._lock:
-            async with aiofiles.open(self.partial_path, "r+b") as f:
-                await f.seek(offset)
-                await f.write(data)
+        fd = self._open()
+        
+        if hasattr(os, "pwrite"):
+            await asyncio.to_thread(self._write_at, fd, offset, data)
+        else:
+            async with self._lock:
+                await asyncio.to_thread(self._seek_write, fd, offset, data)
+        
+        self._schedule_hash()
+    
+    def discard_range(self, start: int, end: int) -> None:
+        """
+        Forget written bytes so they are fetched again, e.g. a corrupt piece.
+        
+        Args:
+            start: First byte of the range
+            end: One past the last byte of the range
+        """
+        self.completed.remove(start, end)
+        
+        # The digest (or a running hash step) covers the bad bytes: start over
+        if self._hasher is not None and start < self._hashing_end:
+            self._hasher = new_hasher(self.hash_algorithm)
+            self._hashed_offset = 0
+            self._hashing_end = 0
+    
+    def _read_at(self, fd: int, offset: int, size: int) -> bytes:
+        """Read size bytes at offset (blocking, runs in a worker thread)."""
+        parts = []
+        while size > 0:
+            if hasattr(os, "pread"):
+                data = os.pread(fd, size, offset)
+            else:
+                os.lseek(fd, offset, os.SEEK_SET)
+                data = os.read(fd, size)
+            if not data:
+                break
+            parts.append(data)
+            offset += len(data)
+            size -= len(data)
+        return b"".join(parts)
+    
+    def _update_hasher(self, fd: int, hasher: Any, offset: int, end: int) -> int:
+        """
+        Feed [offset, end) to hasher in blocks (blocking, runs in a worker thread).
+        
+        Returns:
+            Offset reached (lower than end only at end of file)
+        """
+        while offset < end:
+            data = self._read_at(fd, offset, min(self.HASH_BLOCK_SIZE, end - offset))
+            if not data:
+                break
+            hasher.update(data)
+            offset += len(data)
+        return offset
     
-    async def save_metadata(self, bytes_downloaded: int, chunks: Dict[int, int]) -> None:
+    def _hash_at(self, fd: int, offset: int, size: int, algorithm: str) -> str:
+        """Hash size bytes at offset (blocking, runs in a worker thread)."""
+        hasher = new_hasher(algorithm)
+        self._update_hasher(fd, hasher, offset, offset + size)
+        return hasher.hexdigest()
+    
+    async def hash_range(self, offset: int, size: int, algorithm: str) -> str:
         """
-        Save resume metadata.
+        Hash bytes already written to the partial file.
         
         Args:
-            bytes_downloaded: Total bytes downloaded
-            chunks: Dictionary of {offset: size} for completed chunks
+            offset: Byte offset to start at
+            size: Number of bytes to hash
+            algorithm: hashlib algorithm name, e.g. "sha256"
+        
+        Returns:
+            Hex digest
         """
-        metadata = {
-            "bytes_downloaded": bytes_downloaded,
-            "total_size": self.total_size,
-            "chunks": {str(k): v for k, v in chunks.items()},
-        }
+        fd = self._open()
         
-        async with aiofiles.open(self.metadata_path, "w") as f:
-            await f.write(json.dumps(metadata))
+        if hasattr(os, "pread"):
+            return await asyncio.to_thread(self._hash_at, fd, offset, size, algorithm)
+        async with self._lock:
+            return await asyncio.to_thread(self._hash_at, fd, offset, size, algorithm)
+    
+    def _hashable_end(self) -> int:
+        """End of the contiguous completed prefix starting at byte 0."""
+        for start, end in self.completed:
+            return end if start == 0 else 0
+        return 0
+    
+    def _schedule_hash(self) -> None:
+        """Start hashing newly contiguous data in the background when idle."""
+        if self._hasher is None or self._hash_stopping:
+            return
+        if self._hash_task is not None and not self._hash_task.done():
+            return
+        if self._hashable_end() - self._hashed_offset >= self.HASH_BLOCK_SIZE:
+            self._hash_task = asyncio.create_task(self._advance_hash())
+    
+    async def _hash_step(self, end: int) -> None:
+        """Hash from the current offset up to end in a worker thread."""
+        hasher = self._hasher
+        fd = self._open()
+        self._hashing_end = max(self._hashing_end, end)
+        
+        if hasattr(os, "pread"):
+            reached = await asyncio.to_thread(
+                self._update_hasher, fd, hasher, self._hashed_offset, end
+            )
+        else:
+            async with self._lock:
+                reached = await asyncio.to_thread(
+                    self._update_hasher, fd, hasher, self._hashed_offset, end
+                )
+        
+        # Ignore the result if discard_range() restarted the digest meanwhile
+        if hasher is self._hasher:
+            self._hashed_offset = reached
+            self._hashing_end = reached
+    
+    async def _advance_hash(self) -> None:
+        """Hash the completed prefix as it grows, one HASH_STEP at a time."""
+        while not self._hash_stopping:
+            end = min(self._hashable_end(), self._hashed_offset + self.HASH_STEP)
+            if end <= self._hashed_offset:
+                return
+            await self._hash_step(end)
+    
+    async def finish_hash(self) -> Optional[str]:
+        """
+        Hash whatever the background hashing has not covered yet.
+        
+        Call once every byte is written. For a sequential download nearly
+        all data is hashed by then, so no second pass over the file is needed.
+        
+        Returns:
+            Hex digest, or None if no hash_algorithm was requested
+        """
+        if self._hasher is None:
+            return None
+        
+        if self.digest is None:
+            if self._hash_task is not None:
+                await asyncio.gather(self._hash_task, return_exceptions=True)
+            
+            # Hash to the end of the file; total_size may have been unknown
+            size = os.fstat(self._open()).st_size
+            await self._hash_step(size)
+            self.digest = self._hasher.hexdigest()
+        
+        return self.digest
+    
+    async def close(self) -> None:
+        """Close the partial file descriptor if it is open."""
+        # Let a running hash step finish with the descriptor
+        if self._hash_task is not None:
+            self._hash_stopping = True
+            await asyncio.gather(self._hash_task, return_exceptions=True)
+            self._hash_task = None
+            self._hash_stopping = False
+        
+        # Let an in-flight checkpoint finish with the descriptor first
+        if self._pending_metadata is not None:
+            await asyncio.gather(self._pending_metadata, return_exceptions=True)
+            self._pending_metadata = None
+        
+        if self._fd is not None:
+            fd, self._fd = self._fd, None
+            os.close(fd)
+    
+    async def save_metadata(self) -> None:
+        """
+        Save resume metadata for the completed ranges.
+        
+        The snapshot is taken on the event loop and persisted from a worker
+        thread: partial data is fsynced first, then the metadata is written
+        to a temp file, fsynced and renamed over the old one. A crash at any
+        point leaves either the previous or the new checkpoint on disk.
+        
+        Writes never overlap: a cancelled caller releases the lock while its
+        shielded write keeps running, so the next save waits for it first.
+        """
+        async with self._metadata_lock:
+            if self._pending_metadata is not None:
+                await asyncio.gather(self._pending_metadata, return_exceptions=True)
+            
+            metadata = ResumeMetadata(
+                total_size=self.total_size,
+                ranges=list(self.completed),
+                etag=self.etag,
+                last_modified=self.last_modified,
+            )
+            # Shielded so a cancelled caller never leaves a write running
+            # behind close(), finalize() or cleanup()
+            self._pending_metadata = asyncio.ensure_future(
+                asyncio.to_thread(self._write_metadata, metadata)
+            )
+            await asyncio.shield(self._pending_metadata)
+    
+    def _write_metadata(self, metadata: ResumeMetadata) -> None:
+        """Atomically replace the metadata file (blocking)."""
+        payload = resume_metadata.encode(metadata)
+        
+        # Metadata must never claim bytes that are not durable yet
+        if self._fd is not None:
+            os.fsync(self._fd)
+        
+        tmp_path = self.metadata_path.with_name(self.metadata_path.name + ".tmp")
+        with open(tmp_path, "wb") as f:
+            f.write(payload)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.metadata_path)
+        
+        # Persist the rename itself (not supported on Windows)
+        if hasattr(os, "O_DIRECTORY"):
+            dir_fd = os.open(self.metadata_path.parent, os.O_RDONLY | os.O_DIRECTORY)
+            try:
+                os.fsync(dir_fd)
+            finally:
+                os.close(dir_fd)
     
     async def finalize(self) -> None:
         """
         Finalize download: rename partial to final and clean up metadata.
+        
+        The digest (if requested) is complete and available as ``digest``.
         """
+        await self.finish_hash()
+        await self.close()
+        
         async with self._lock:
             # Rename partial to final
             if self.partial_path.exists():
@@ -138,6 +401,8 @@ class AsyncFileWriter:
     
     async def cleanup(self) -> None:
         """Clean up partial files (on cancel/error)."""
+        await self.close()
+        
         if self.partial_path.exists():
             self.partial_path.unlink()
         if self.metadata_path.exists():
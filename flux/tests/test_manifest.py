@@ -0,0 +1,152 @@
+"""Tests for Metalink and JSON manifest parsing."""
+
+import json
+from pathlib import Path
+
+import pytest
+
+from flux.core.manifest import (
+    load_manifest,
+    normalize_hash_type,
+    parse_json_manifest,
+    parse_metalink,
+)
+
+METALINK = """<?xml version="1.0" encoding="UTF-8"?>
+<metalink xmlns="urn:ietf:params:xml:ns:metalink">
+  <file name="{name}">
+    <size>1048576</size>
+    <hash type="md5">{md5}</hash>
+    <hash type="sha-256">{sha256}</hash>
+    <hash type="sha-1">{sha1}</hash>
+    <pieces length="262144" type="sha-1">
+      <hash>AA</hash>
+      <hash>bb</hash>
+    </pieces>
+    <url priority="2">https://b.example/image.iso</url>
+    <url priority="1">https://a.example/image.iso</url>
+  </file>
+</metalink>
+"""
+
+HASHES = {"md5": "1" * 32, "sha1": "2" * 40, "sha256": "3" * 64}
+
+
+def _metalink(name: str = "image.iso", **hashes: str) -> str:
+    """A one-file Metalink document."""
+    return METALINK.format(name=name, **{**HASHES, **hashes})
+
+
+def test_parse_metalink() -> None:
+    """Sources are ordered by priority and pieces are read."""
+    (manifest,) = parse_metalink(_metalink())
+    assert manifest.name == "image.iso"
+    assert manifest.size == 1048576
+    assert manifest.urls == ["https://a.example/image.iso", "https://b.example/image.iso"]
+    assert manifest.piece_length == 262144
+    assert manifest.piece_hash_type == "sha1"
+    assert manifest.piece_hashes == ["aa", "bb"]
+
+
+def test_metalink_prefers_strongest_hash() -> None:
+    """sha-256 wins over sha-1 and md5 whatever their order."""
+    (manifest,) = parse_metalink(_metalink(sha256="ABC" * 21 + "D"))
+    assert manifest.hash_type == "sha256"
+    assert manifest.hash_value == "abc" * 21 + "d"
+
+
+@pytest.mark.parametrize("element", ["<size></size>", '<hash type="sha-256"> </hash>'])
+def test_metalink_empty_elements_raise_value_error(element: str) -> None:
+    """Empty <size> or <hash> elements are malformed, not crashes."""
+    document = (
+        '<metalink xmlns="urn:ietf:params:xml:ns:metalink"><file name="a">'
+        f"{element}<url>https://a.example/a</url></file></metalink>"
+    )
+    with pytest.raises(ValueError):
+        parse_metalink(document)
+
+
+def test_metalink_errors() -> None:
+    """Invalid XML, files without URLs and empty documents are rejected."""
+    with pytest.raises(ValueError):
+        parse_metalink("<metalink")
+    with pytest.raises(ValueError, match="No URLs"):
+        parse_metalink('<metalink><file name="a"><size>1</size></file></metalink>')
+    with pytest.raises(ValueError, match="no files"):
+        parse_metalink("<metalink></metalink>")
+
+
+@pytest.mark.parametrize(
+    "name", ["../evil", "..", ".", "a/b", "a\\b", "/etc/passwd", "dir/../../x"]
+)
+def test_unsafe_names_are_rejected(name: str) -> None:
+    """Names that could leave the output directory are rejected."""
+    with pytest.raises(ValueError, match="Unsafe"):
+        parse_metalink(_metalink(name=name))
+    with pytest.raises(ValueError, match="Unsafe"):
+        parse_json_manifest(json.dumps({"name": name, "url": "https://a.example/x"}))
+
+
+@pytest.mark.parametrize("name", ["a..b.iso", "pkg-1.0..rc.tar.gz", ".hidden", "x.."])
+def test_dotted_names_are_allowed(name: str) -> None:
+    """Dots inside a plain file name are fine."""
+    (manifest,) = parse_json_manifest(json.dumps({"name": name, "url": "https://a.example/x"}))
+    assert manifest.name == name
+
+
+def test_parse_json_manifest() -> None:
+    """A full JSON entry maps onto the manifest fields."""
+    entry = {
+        "name": "image.iso",
+        "size": 1048576,
+        "urls": ["https://a.example/image.iso", "https://b.example/image.iso"],
+        "hash": {"type": "SHA-256", "value": "AB" * 32},
+        "pieces": {"length": 262144, "type": "sha256", "hashes": ["CD" * 32]},
+    }
+    (manifest,) = parse_json_manifest(json.dumps(entry))
+    assert manifest.urls == entry["urls"]
+    assert manifest.size == 1048576
+    assert (manifest.hash_type, manifest.hash_value) == ("sha256", "ab" * 32)
+    assert manifest.piece_length == 262144
+    assert manifest.piece_hashes == ["cd" * 32]
+
+
+def test_json_manifest_document_shapes() -> None:
+    """A single entry, a list and {"files": [...]} are all accepted."""
+    entry = {"url": "https://a.example/a"}
+    for document in (entry, [entry, entry], {"files": [entry]}):
+        manifests = parse_json_manifest(json.dumps(document))
+        assert all(m.urls == ["https://a.example/a"] for m in manifests)
+
+
+def test_json_manifest_errors() -> None:
+    """Malformed JSON and entries are reported as ValueError."""
+    with pytest.raises(ValueError):
+        parse_json_manifest("{")
+    with pytest.raises(ValueError, match="No URLs"):
+        parse_json_manifest(json.dumps({"name": "a"}))
+    with pytest.raises(ValueError):
+        parse_json_manifest(json.dumps({"url": "https://a.example/a", "hash": {"value": "x"}}))
+    with pytest.raises(ValueError, match="Unsupported hash"):
+        parse_json_manifest(
+            json.dumps({"url": "https://a.example/a", "hash": {"type": "nope", "value": "x"}})
+        )
+
+
+def test_normalize_hash_type() -> None:
+    """Metalink hash names map to hashlib names."""
+    assert normalize_hash_type("SHA-256") == "sha256"
+    assert normalize_hash_type("md5") == "md5"
+    with pytest.raises(ValueError):
+        normalize_hash_type("sha-999")
+
+
+def test_load_manifest_detects_format(tmp_path: Path) -> None:
+    """Metalink and JSON files are told apart by their content."""
+    metalink_path = tmp_path / "image.meta4"
+    metalink_path.write_text(_metalink(), encoding="utf-8")
+    json_path = tmp_path / "image.json"
+    json_path.write_text(json.dumps({"url": "https://a.example/a"}), encoding="utf-8")
+    
+    assert load_manifest(str(metalink_path))[0].name == "image.iso"
+    assert load_manifest(str(json_path))[0].urls == ["https://a.example/a"]
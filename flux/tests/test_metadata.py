@@ -0,0 +1,108 @@
+"""Tests for the binary resume metadata format and its JSON migration."""
+
+import json
+import struct
+import zlib
+
+import pytest
+
+from flux.storage import metadata
+from flux.storage.metadata import MAGIC, ResumeMetadata, decode, encode
+
+
+def _with_crc(body: bytes) -> bytes:
+    """Append a valid checksum to a hand-made body."""
+    return body + struct.pack("<I", zlib.crc32(body))
+
+
+def test_round_trip() -> None:
+    """Decoding an encoded checkpoint gives it back unchanged."""
+    original = ResumeMetadata(
+        total_size=10 * 1024**3,
+        ranges=[(0, 1024), (4096, 8192), (2**33, 2**33 + 7)],
+        etag='"abc-ü"',
+        last_modified="Wed, 21 Oct 2015 07:28:00 GMT",
+    )
+    data = encode(original)
+    assert data.startswith(MAGIC)
+    assert decode(data) == original
+
+
+def test_round_trip_without_validators_or_ranges() -> None:
+    """Missing validators come back as None and no ranges as an empty list."""
+    original = ResumeMetadata(total_size=0)
+    assert decode(encode(original)) == original
+
+
+def test_round_trip_many_ranges() -> None:
+    """Fragmented files keep every range in order."""
+    ranges = [(offset, offset + 100) for offset in range(0, 1_000_000, 250)]
+    decoded = decode(encode(ResumeMetadata(total_size=1_000_000, ranges=ranges)))
+    assert decoded.ranges == ranges
+
+
+def test_corrupt_data_is_rejected() -> None:
+    """Any flipped byte fails the checksum."""
+    data = bytearray(encode(ResumeMetadata(total_size=100, ranges=[(0, 50)], etag='"x"')))
+    for index in range(len(MAGIC), len(data)):
+        corrupt = bytearray(data)
+        corrupt[index] ^= 0xFF
+        with pytest.raises(ValueError):
+            decode(bytes(corrupt))
+
+
+def test_truncated_data_is_rejected() -> None:
+    """Checkpoints cut short by a crash are rejected, not misread."""
+    data = encode(ResumeMetadata(total_size=100, ranges=[(0, 50)]))
+    for length in range(len(MAGIC), len(data)):
+        with pytest.raises(ValueError):
+            decode(data[:length])
+
+
+def test_unknown_version_is_rejected() -> None:
+    """A newer layout is not parsed as the current one."""
+    body = encode(ResumeMetadata(total_size=100))[:-4]
+    body = body[:4] + struct.pack("<H", metadata.VERSION + 1) + body[6:]
+    with pytest.raises(ValueError, match="version"):
+        decode(_with_crc(body))
+
+
+def test_range_count_mismatch_is_rejected() -> None:
+    """The header's range count must match the ranges stored."""
+    body = encode(ResumeMetadata(total_size=100, ranges=[(0, 10), (20, 30)]))[:-4]
+    with pytest.raises(ValueError, match="range count"):
+        decode(_with_crc(body[:-16]))
+
+
+def test_migrates_json_ranges_layout() -> None:
+    """The JSON layout with a "ranges" list is still readable."""
+    data = json.dumps({"total_size": 1000, "ranges": [[0, 100], [500, 600]]}).encode()
+    decoded = decode(data)
+    assert decoded.total_size == 1000
+    assert decoded.ranges == [(0, 100), (500, 600)]
+    assert decoded.etag is None and decoded.last_modified is None
+
+
+def test_migrates_json_chunks_layout() -> None:
+    """The oldest layout, {offset: size} per chunk, becomes ranges."""
+    data = json.dumps({"total_size": 300, "chunks": {"0": 100, "200": 100}}).encode()
+    decoded = decode(data)
+    assert decoded.total_size == 300
+    assert sorted(decoded.ranges) == [(0, 100), (200, 300)]
+
+
+def test_garbage_is_rejected() -> None:
+    """Data in no known format raises ValueError."""
+    with pytest.raises(ValueError):
+        decode(b"\x00\x01 not metadata")
+
+
+def test_matches_source() -> None:
+    """ETags win over Last-Modified; missing validators trust the data."""
+    checkpoint = ResumeMetadata(total_size=1, etag='"a"', last_modified="Mon")
+    assert checkpoint.matches_source('"a"', "Tue")
+    assert not checkpoint.matches_source('"b"', "Mon")
+    assert checkpoint.matches_source(None, "Mon")
+    assert not checkpoint.matches_source(None, "Tue")
+    assert checkpoint.matches_source(None, None)
+    assert ResumeMetadata(total_size=1).matches_source('"a"', "Mon")
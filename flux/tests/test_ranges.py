@@ -0,0 +1,121 @@
+"""Tests for the RangeSet interval set."""
+
+import random
+from typing import Optional, Set, Tuple
+
+from flux.storage.ranges import RangeSet
+
+
+def _bytes_of(ranges: RangeSet) -> Set[int]:
+    """Every byte offset covered by a range set."""
+    return {offset for start, end in ranges for offset in range(start, end)}
+
+
+def _first_gap(covered: Set[int], offset: int, limit: int) -> Optional[Tuple[int, int]]:
+    """Reference next_missing() over a set of covered offsets."""
+    while offset < limit and offset in covered:
+        offset += 1
+    if offset >= limit:
+        return None
+    end = offset
+    while end < limit and end not in covered:
+        end += 1
+    return offset, end
+
+
+def test_add_merges_overlapping_and_adjacent_ranges() -> None:
+    """Touching and overlapping ranges collapse into one."""
+    ranges = RangeSet()
+    ranges.add(10, 20)
+    ranges.add(30, 40)
+    ranges.add(20, 30)
+    assert list(ranges) == [(10, 40)]
+    assert ranges.total == 30
+    
+    ranges.add(5, 15)
+    ranges.add(35, 50)
+    assert list(ranges) == [(5, 50)]
+    assert ranges.total == 45
+
+
+def test_add_ignores_empty_ranges() -> None:
+    """Empty and inverted ranges change nothing."""
+    ranges = RangeSet([(0, 10)])
+    ranges.add(20, 20)
+    ranges.add(30, 25)
+    assert list(ranges) == [(0, 10)]
+    assert ranges.total == 10
+
+
+def test_remove_splits_ranges() -> None:
+    """Removing the middle of a range leaves both ends."""
+    ranges = RangeSet([(0, 100)])
+    ranges.remove(40, 60)
+    assert list(ranges) == [(0, 40), (60, 100)]
+    assert ranges.total == 80
+    
+    # Touching a range is not overlapping it
+    ranges.remove(100, 120)
+    ranges.remove(40, 60)
+    assert ranges.total == 80
+    
+    ranges.remove(30, 70)
+    assert list(ranges) == [(0, 30), (70, 100)]
+    assert ranges.total == 60
+
+
+def test_contains() -> None:
+    """Only fully covered ranges are contained."""
+    ranges = RangeSet([(0, 10), (20, 30)])
+    assert ranges.contains(0, 10)
+    assert ranges.contains(22, 28)
+    assert ranges.contains(5, 5)
+    assert not ranges.contains(5, 25)
+    assert not ranges.contains(10, 11)
+    assert not ranges.contains(30, 31)
+
+
+def test_next_missing() -> None:
+    """Gaps are found from any offset and clipped to the limit."""
+    ranges = RangeSet([(0, 10), (20, 30)])
+    assert ranges.next_missing(0, 100) == (10, 20)
+    assert ranges.next_missing(15, 100) == (15, 20)
+    assert ranges.next_missing(20, 100) == (30, 100)
+    assert ranges.next_missing(20, 25) is None
+    assert ranges.next_missing(0, 15) == (10, 15)
+    assert RangeSet().next_missing(0, 50) == (0, 50)
+
+
+def test_matches_byte_set_model() -> None:
+    """Random adds and removes agree with a plain set of offsets."""
+    rng = random.Random(1234)
+    size = 200
+    
+    for _ in range(50):
+        ranges = RangeSet()
+        covered: Set[int] = set()
+        
+        for _ in range(40):
+            start = rng.randrange(size)
+            end = rng.randrange(start, size + 1)
+            if rng.random() < 0.6:
+                ranges.add(start, end)
+                covered.update(range(start, end))
+            else:
+                ranges.remove(start, end)
+                covered.difference_update(range(start, end))
+            
+            assert _bytes_of(ranges) == covered
+            assert ranges.total == len(covered)
+            
+            # Stored ranges stay sorted, non-empty and never touch
+            bounds = list(ranges)
+            assert all(start < end for start, end in bounds)
+            assert all(a[1] < b[0] for a, b in zip(bounds, bounds[1:]))
+            
+            probe = rng.randrange(size)
+            probe_end = rng.randrange(probe, size + 1)
+            assert ranges.contains(probe, probe_end) == covered.issuperset(
+                range(probe, probe_end)
+            )
+            assert ranges.next_missing(probe, size) == _first_gap(covered, probe, size)
@@ -287,13 +287,14 @@ class FluxApp(App):
                 timestamp = __import__("time").strftime("%H:%M:%S")
                 log.write(f"[#00ff41][{timestamp}] 1 Started: {task.filename}[/#00ff41]")
         
+        elif event_type == "download_queued":
+            download_id = data["download_id"]
+            task = self.engine.get_download(download_id)
+            if task:
+                log.write(f"[#ffaa00]Waiting for a free slot: {task.filename}[/#ffaa00]")
+        
         elif event_type == "download_completed":
             log.write(f"[#00ff41]Completed: {data['filepath']}[/#00ff41]")
-            
-            # Auto-start next queued download
-            queued = self.engine.get_downloads_by_status(DownloadStatus.QUEUED)
-            if queued:
-                asyncio.create_task(self.engine.start_download(queued[0].id))
         
         elif event_type == "download_failed":
             error_msg = data.get('error', 'Unknown error')
@@ -492,6 +493,11 @@ class FluxApp(App):
             # Expand path
             path = os.path.expanduser(path)
             
+            urls = url.split()
+            if len(urls) > 1:
+                await self._add_many_downloads(urls, path)
+                return
+            
             try:
                 # Pass auto_start flag to engine - if OFF, download stays queued
                 download_id = await self.engine.add_download(
@@ -514,6 +520,24 @@ class FluxApp(App):
                 log = self.query_one("#activity_log", ActivityLogWidget)
                 log.write(f"[bold red]Error:[/bold red] {str(e)}")
     
+    async def _add_many_downloads(self, urls: list[str], path: str) -> None:
+        """Add several URLs at once, probing them concurrently."""
+        log = self.query_one("#activity_log", ActivityLogWidget)
+        log.write(f"[#00d9ff]Adding {len(urls)} downloads...[/#00d9ff]")
+        
+        results = await self.engine.add_downloads(
+            urls, path, auto_start=self.auto_start_enabled
+        )
+        added = [result for result in results if isinstance(result, str)]
+        for url, result in zip(urls, results):
+            if not isinstance(result, str):
+                log.write(f"[bold red]Error:[/bold red] {url}: {result}")
+        
+        if added:
+            self.selected_download_id = added[0]
+            self.current_tab_index = 1 if self.auto_start_enabled else 0
+        log.write(f"[#00ff41]Added {len(added)} of {len(urls)} downloads[/#00ff41]")
+    
 
     @work(exclusive=True)
     async def action_start(self) -> None:
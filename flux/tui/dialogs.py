@@ -12,7 +12,8 @@ class AddDownloadDialog(ModalScreen[tuple[str, str, str] | None]):
     """
     Modal dialog for adding a new download.
     
-    Returns tuple of (url, path, filename) or None if cancelled.
+    Returns tuple of (url, path, filename) or None if cancelled; url may
+    hold several space-separated URLs.
     """
     
     DEFAULT_BORDER_TITLE = "Add Download"
@@ -91,7 +92,7 @@ class AddDownloadDialog(ModalScreen[tuple[str, str, str] | None]):
         """Compose dialog widgets."""
         with Container():
             yield Static("━━━ Add Download ━━━", classes="title")
-            yield Label("URL:")
+            yield Label("URL (separate several with spaces):")
             yield Input(
                 placeholder="https://example.com/file.zip",
                 id="url_input",
@@ -128,16 +129,19 @@ class AddDownloadDialog(ModalScreen[tuple[str, str, str] | None]):
     
     def _submit(self) -> None:
         """Submit dialog with inputs."""
-        url = self.query_one("#url_input", Input).value.strip()
+        urls = self.query_one("#url_input", Input).value.split()
         path = self.query_one("#path_input", Input).value.strip()
         filename = self.query_one("#filename_input", Input).value.strip()
         
         # Validate URL
-        if not url:
+        if not urls:
             return
         
-        if not url.startswith(("http://", "https://")):
-            url = "https://" + url
+        urls = [
+            url if url.startswith(("http://", "https://")) else "https://" + url
+            for url in urls
+        ]
+        url = " ".join(urls)
         
         # Use defaults if needed
         if not path: